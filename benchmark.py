@@ -0,0 +1,258 @@
+# Benchmark suite: dashboard sections and challenge queries at several scales
+
+"""
+    python benchmark.py                          # 1M, 10M and 100M rows
+    python benchmark.py --scales 100k,1M --label before-refactor
+    python benchmark.py --scales 10M --backends pandas,sqlite,duckdb
+    python benchmark.py --scales 10M --readers pandas,pyarrow --skip-dashboard --skip-challenges
+
+For every scale we generate (once) a synthetic sales file, then time:
+  - each dashboard section of portfolio_project.py (via SalesAnalyzer)
+  - each of the 15 challenges.py queries (plus the index-backed filters),
+    and all 15 as one planned batch with shared work done once (sales_query.py)
+  - with --backends, the same dashboard and challenges run as SQL in
+    SQLite / DuckDB (sales_sql.py), for a pandas-vs-SQL comparison
+  - with --readers, loading the file whole and in chunks with each CSV
+    parser (sales_io.py), from the plain CSV and from a gzip copy of it
+
+Every measurement records wall time and the process's peak RSS so far.
+Each scale runs in fresh worker processes, so one scale's memory never
+leaks into the next. Results are appended to a JSON file as one "run" per
+invocation, labelled (by default) with the git commit, so versions can be
+compared side by side.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_SCALES = '1M,10M,100M'
+DATA_DIR = 'bench_data'
+RESULTS_FILE = 'benchmark_results.json'
+
+# The full timeline of 100M rows is not a useful thing to render - the
+# dashboard benchmark prints one page of it, like a real report would
+TIMELINE_LIMIT = 1000
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _measure(step, kind, rows, func):
+    start = time.perf_counter()
+    func()
+    record = {
+        'step': step,
+        'kind': kind,
+        'rows': rows,
+        'wall_s': round(time.perf_counter() - start, 6),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+    print(json.dumps(record), flush=True)
+
+
+# ============================================
+# WORKERS (run in a child process per scale)
+# ============================================
+def run_dashboard(path, use_cache, backend='pandas'):
+    from sales_analyzer import SalesAnalyzer
+
+    kind = 'dashboard' if backend == 'pandas' else f'dashboard:{backend}'
+    analyzer = SalesAnalyzer(path, use_cache=use_cache, backend=backend,
+                             timeline_k=None if backend == 'pandas' else TIMELINE_LIMIT)
+    _measure('load', kind, None, lambda: analyzer.agg)
+    rows = analyzer.total_transactions
+
+    sections = [
+        ('summary', analyzer.summary),
+        ('regional', analyzer.regional),
+        ('products', analyzer.products),
+        ('pivot', analyzer.pivot),
+        ('timeline', lambda: analyzer.timeline(TIMELINE_LIMIT)),
+        ('insights', analyzer.insights),
+        ('advanced', analyzer.advanced),
+    ]
+    for name, section in sections:
+        _measure(name, kind, rows, section)
+
+    with tempfile.TemporaryDirectory() as folder:
+        _measure('export', kind, rows, lambda: analyzer.export(folder))
+
+
+def run_challenges(path):
+    from challenge_queries import CHALLENGE_QUERIES, INDEXED_QUERIES
+    from sales_index import SalesIndex
+    from sales_io import read_sales
+    from sales_query import plan_queries
+
+    frame = {}
+    _measure('load', 'challenges', None, lambda: frame.setdefault('df', read_sales(path)))
+    df = frame['df']
+    for number, query in CHALLENGE_QUERIES.items():
+        _measure(f"challenge_{number:02d}_{query.__name__}", 'challenges', len(df), lambda: query(df))
+
+    built = {}
+    _measure('index_build', 'challenges', len(df), lambda: built.setdefault('index', SalesIndex.from_frame(df)))
+    index = built['index']
+    for number, query in INDEXED_QUERIES.items():
+        _measure(f"challenge_{number:02d}_{query.__name__}", 'challenges', len(df), lambda: query(df, index))
+
+    _measure('planned_batch', 'challenges', len(df), lambda: plan_queries(df).run())
+
+
+def run_sql_challenges(path, backend):
+    from sales_sql import CHALLENGE_SQL, open_backend
+
+    kind = f'challenges:{backend}'
+    opened = {}
+    # Builds the database file on the first run for this data file
+    _measure('load', kind, None, lambda: opened.setdefault('db', open_backend(backend, path)))
+    database = opened['db']
+    rows = database.connection.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+    for number in CHALLENGE_SQL:
+        _measure(f"challenge_{number:02d}_sql", kind, rows, lambda: database.challenge(number))
+
+
+def run_reader(path, reader):
+    from sales_io import CHUNKSIZE, iter_sales_chunks, read_sales
+
+    kind = f'read:{reader}'
+    source = 'csv.gz' if path.endswith('.gz') else 'csv'
+    frame = {}
+    _measure(f'{source}_whole', kind, None, lambda: frame.setdefault('df', read_sales(path, reader=reader)))
+    rows = len(frame.pop('df'))
+    _measure(f'{source}_chunks', kind, rows,
+             lambda: sum(len(chunk) for chunk in iter_sales_chunks(path, CHUNKSIZE, reader=reader)))
+
+
+# ============================================
+# DRIVER
+# ============================================
+def _git_label():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _run_worker(worker, path, extra=()):
+    command = [sys.executable, os.path.abspath(__file__), '--worker', worker, '--data', path, *extra]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return [json.loads(line) for line in output.splitlines() if line.startswith('{')]
+
+
+def ensure_data(scale, rows, args):
+    from generate_sales_data import generate
+
+    path = os.path.join(args.data_dir, f"sales_{scale}.csv")
+    if not os.path.exists(path):
+        print(f"⏳ Generating {rows:,} rows -> {path}", flush=True)
+        generate(path, rows, regions=args.regions, products=args.products, days=args.days, skew=args.skew)
+    return path
+
+
+def ensure_gzip(path):
+    # Compressed once, streamed; the reader benchmark decompresses while parsing
+    gz_path = path + '.gz'
+    if not os.path.exists(gz_path):
+        print(f"⏳ Compressing {path} -> {gz_path}", flush=True)
+        with open(path, 'rb') as src, gzip.open(gz_path + '.tmp', 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        os.replace(gz_path + '.tmp', gz_path)
+    return gz_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sales dashboard and challenge queries")
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help="comma-separated row counts, e.g. 100k,1M,10M")
+    parser.add_argument('--regions', type=int, default=4)
+    parser.add_argument('--products', type=int, default=3)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--skew', type=float, default=0.0)
+    parser.add_argument('--data-dir', default=DATA_DIR, help="where generated data files are kept")
+    parser.add_argument('--results', default=RESULTS_FILE, help="JSON file the run is appended to")
+    parser.add_argument('--label', help="name for this run (default: current git commit)")
+    parser.add_argument('--cache', action='store_true', help="let the dashboard use the columnar cache")
+    parser.add_argument('--skip-dashboard', action='store_true')
+    parser.add_argument('--skip-challenges', action='store_true')
+    parser.add_argument('--backends', default='pandas',
+                        help="comma-separated: pandas, sqlite, duckdb (SQL runs via sales_sql.py)")
+    parser.add_argument('--readers',
+                        help="comma-separated CSV parsers to time on plain and gzip input: pandas, pyarrow")
+    # Internal: run one worker in this process
+    parser.add_argument('--worker', choices=['dashboard', 'challenges', 'reader'], help=argparse.SUPPRESS)
+    parser.add_argument('--data', help=argparse.SUPPRESS)
+    parser.add_argument('--backend', default='pandas', help=argparse.SUPPRESS)
+    parser.add_argument('--reader', default='pandas', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker == 'dashboard':
+        return run_dashboard(args.data, use_cache=args.cache, backend=args.backend)
+    if args.worker == 'challenges':
+        if args.backend != 'pandas':
+            return run_sql_challenges(args.data, args.backend)
+        return run_challenges(args.data)
+    if args.worker == 'reader':
+        return run_reader(args.data, args.reader)
+
+    from generate_sales_data import parse_count
+
+    import pandas as pd
+
+    run = {
+        'label': args.label or _git_label(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'results': [],
+    }
+
+    for scale in args.scales.split(','):
+        scale = scale.strip()
+        rows = parse_count(scale)
+        path = ensure_data(scale, rows, args)
+
+        workers = []
+        for backend in args.backends.split(','):
+            backend = ['--backend', backend.strip()]
+            if not args.skip_dashboard:
+                workers.append(('dashboard', path, backend + (['--cache'] if args.cache else [])))
+            if not args.skip_challenges:
+                workers.append(('challenges', path, backend))
+        if args.readers:
+            sources = [path, ensure_gzip(path)]
+            for reader in args.readers.split(','):
+                workers.extend(('reader', source, ['--reader', reader.strip()]) for source in sources)
+
+        for worker, data, extra in workers:
+            for record in _run_worker(worker, data, extra):
+                record['scale'] = scale
+                run['results'].append(record)
+                print(f"  {scale:>6} {record['kind']:<10} {record['step']:<45}"
+                      f" {record['wall_s']:>10.3f}s {record['peak_rss_mb']:>9.1f} MB", flush=True)
+
+    history = {'runs': []}
+    if os.path.exists(args.results):
+        with open(args.results) as f:
+            history = json.load(f)
+    history['runs'].append(run)
+    with open(args.results, 'w') as f:
+        json.dump(history, f, indent=2)
+    print(f"\n📈 Results for '{run['label']}' appended to {args.results}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+# The 15 challenges.py queries as reusable functions
+
+"""
+Same solutions as challenges.py, but each one is a function of the sales
+DataFrame so they can be benchmarked (and compared against other query
+backends) without running the whole practice script.
+
+Challenges 3, 9, 10 and 14 also have index-backed versions (see
+sales_index.py) taking (df, index) - same results, no full-column scans.
+sales_query.py runs all 15 as one planned batch that shares their
+group-bys, filters and sorts.
+"""
+
+from sales_topn import nlargest
+
+
+def select_date_revenue(df):
+    # SELECT date, revenue FROM sales
+    return df[['revenue', 'date']]
+
+
+def high_revenue_sales(df):
+    # SELECT * FROM sales WHERE revenue > 1200
+    return df[df['revenue'] > 1200]
+
+
+def west_region_sales(df):
+    # SELECT * FROM sales WHERE region = 'West'
+    return df[df['region'] == 'West']
+
+
+def total_revenue(df):
+    # SELECT SUM(revenue) FROM sales
+    return df['revenue'].sum()
+
+
+def revenue_by_product(df):
+    # SELECT product, SUM(revenue) FROM sales GROUP BY product
+    return df.groupby('product', observed=True)['revenue'].sum()
+
+
+def sales_count_by_region(df):
+    # SELECT region, COUNT(*) FROM sales GROUP BY region
+    return df.groupby('region', observed=True)['revenue'].size()
+
+
+def average_revenue_by_region(df):
+    # SELECT region, AVG(revenue) FROM sales GROUP BY region
+    return df.groupby('region', observed=True)['revenue'].mean()
+
+
+def sales_sorted_by_revenue(df):
+    # SELECT * FROM sales ORDER BY revenue DESC
+    return df.sort_values('revenue', ascending=False)
+
+
+def east_product_a_sales(df):
+    # SELECT * FROM sales WHERE region = 'East' AND product = 'A'
+    return df[(df['region'] == 'East') & (df['product'] == 'A')]
+
+
+def product_b_revenue(df):
+    # SELECT SUM(revenue) FROM sales WHERE product = 'B'
+    return df[df['product'] == 'B']['revenue'].sum()
+
+
+def top_3_sales(df):
+    # SELECT * FROM sales ORDER BY revenue DESC LIMIT 3
+    return nlargest(df, 3, 'revenue')
+
+
+def product_stats(df):
+    # SELECT product, SUM(revenue), AVG(revenue), COUNT(*) FROM sales GROUP BY product
+    return df.groupby('product', observed=True)['revenue'].agg(['sum', 'mean', 'count'])
+
+
+def region_revenue_percentages(df):
+    # Each region's share of total revenue
+    total_by_region = df.groupby('region', observed=True)['revenue'].sum()
+    return (total_by_region / df['revenue'].sum()) * 100
+
+
+def high_value_east_west_sales(df):
+    # SELECT * FROM sales WHERE revenue > 1000 AND (region = 'East' OR region = 'West')
+    return df[(df['revenue'] > 1000) & ((df['region'] == 'East') | (df['region'] == 'West'))]
+
+
+def best_product_by_region(df):
+    # For each region, the product with the highest revenue
+    best = {}
+    for region in df['region'].unique():
+        region_data = df[df['region'] == region]
+        product_revenue = region_data.groupby('product', observed=True)['revenue'].sum()
+        best[region] = (product_revenue.idxmax(), product_revenue.max())
+    return best
+
+
+# Challenge number -> query, in challenges.py order
+CHALLENGE_QUERIES = {
+    1: select_date_revenue,
+    2: high_revenue_sales,
+    3: west_region_sales,
+    4: total_revenue,
+    5: revenue_by_product,
+    6: sales_count_by_region,
+    7: average_revenue_by_region,
+    8: sales_sorted_by_revenue,
+    9: east_product_a_sales,
+    10: product_b_revenue,
+    11: top_3_sales,
+    12: product_stats,
+    13: region_revenue_percentages,
+    14: high_value_east_west_sales,
+    15: best_product_by_region,
+}
+
+
+# ============================================
+# INDEX-BACKED FILTERS
+# ============================================
+def west_region_sales_indexed(df, index):
+    return df.iloc[index.eq('region', 'West')]
+
+
+def east_product_a_sales_indexed(df, index):
+    return df.iloc[index.intersect(index.eq('region', 'East'), index.eq('product', 'A'))]
+
+
+def product_b_revenue_indexed(df, index):
+    return df['revenue'].iloc[index.eq('product', 'B')].sum()
+
+
+def high_value_east_west_sales_indexed(df, index):
+    return df.iloc[index.intersect(index.greater_than(1000), index.isin('region', ['East', 'West']))]
+
+
+INDEXED_QUERIES = {
+    3: west_region_sales_indexed,
+    9: east_product_a_sales_indexed,
+    10: product_b_revenue_indexed,
+    14: high_value_east_west_sales_indexed,
+}
@@ -11,9 +11,16 @@ When you solve these, explain your logic out loud:
 This is exactly how you'd answer in an interview!
 """
 
-import pandas as pd
+from sales_index import load_index
+from sales_io import read_sales
+from sales_topn import nlargest
 
-df = pd.read_csv("sales_data.csv")
+# Compact schema: categorical region/product, parsed dates, small-int revenue
+df = read_sales("sales_data.csv")
+
+# Row-id index over region, product and revenue (saved in .sales_cache/),
+# so the WHERE filters below jump straight to the matching rows
+index = load_index("sales_data.csv", df)
 
 print("=" * 70)
 print("DAY 2 CHALLENGES - SQL THINKING")
@@ -68,7 +75,8 @@ print("Task: Show all sales from the West region")
 print("SQL equivalent: SELECT * FROM sales WHERE region = 'West'")
 
 # YOUR CODE HERE
-west_sales = df[df['region'] == 'West']
+# Same as df[df['region'] == 'West'], looked up in the index
+west_sales = df.iloc[index.eq('region', 'West')]
 print("\nWest region sales:")
 
 # Uncomment to test:
@@ -175,7 +183,8 @@ print("Task: Show sales that are BOTH in East region AND for Product A")
 print("SQL: SELECT * FROM sales WHERE region = 'East' AND product = 'A'")
 
 # YOUR CODE HERE
-east_product_a = df[(df['region'] == 'East') & (df['product'] == 'A')]
+# AND = rows in both lists
+east_product_a = df.iloc[index.intersect(index.eq('region', 'East'), index.eq('product', 'A'))]
 
 # Uncomment to test:
 print(east_product_a)
@@ -194,7 +203,7 @@ print("Task: What's the total revenue for Product B only?")
 print("SQL: SELECT SUM(revenue) FROM sales WHERE product = 'B'")
 
 # YOUR CODE HERE
-product_b_revenue = df[df['product'] == 'B']['revenue'].sum()
+product_b_revenue = df['revenue'].iloc[index.eq('product', 'B')].sum()
 
 # Uncomment to test:
 print(f"Product B total revenue: ${product_b_revenue}")
@@ -215,7 +224,9 @@ print("Task: Show the 3 highest-revenue sales")
 print("SQL equivalent: SELECT * FROM sales ORDER BY revenue DESC LIMIT 3")
 
 # YOUR CODE HERE
-top_3_sales = df.sort_values('revenue', ascending=False).head(3)
+# Same rows as df.sort_values('revenue', ascending=False).head(3), without
+# sorting everything: pick the 3 best, then sort only those
+top_3_sales = nlargest(df, 3, 'revenue')
 print("\nTop 3 highest revenue sales:")
 
 # Uncomment to test:
@@ -284,7 +295,8 @@ print("SQL: SELECT * FROM sales")
 print("     WHERE revenue > 1000 AND (region = 'East' OR region = 'West')")
 
 # YOUR CODE HERE
-complex_filter = df[(df['revenue'] > 1000) & ((df['region'] == 'East') | (df['region'] == 'West'))]
+# OR = rows in either list (IN), then AND with the revenue range
+complex_filter = df.iloc[index.intersect(index.greater_than(1000), index.isin('region', ['East', 'West']))]
 
 # Uncomment to test:
 print(complex_filter)
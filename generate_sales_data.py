@@ -0,0 +1,115 @@
+# Synthetic sales data generator (same schema as sales_data.csv)
+
+"""
+Writes date,product,region,revenue rows for benchmarking at scale:
+
+    python generate_sales_data.py --rows 10M --output bench_data/sales_10M.csv
+    python generate_sales_data.py --rows 1M --regions 200 --products 5000 --skew 1.2
+
+Rows are written in blocks, so even 100M rows never sit in memory at once.
+Dates increase through the file (like real daily appends); region and
+product popularity follow a Zipf-like curve controlled by --skew
+(0 = uniform, higher = a few big regions / best sellers).
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+BLOCK_ROWS = 1_000_000
+
+BASE_REGIONS = ['North', 'South', 'East', 'West']
+
+
+def parse_count(value):
+    """'1M' -> 1_000_000, '250k' -> 250_000, '1000' -> 1000."""
+    value = str(value).strip().upper().replace('_', '')
+    for suffix, factor in (('K', 1_000), ('M', 1_000_000), ('B', 1_000_000_000)):
+        if value.endswith(suffix):
+            return int(float(value[:-1]) * factor)
+    return int(value)
+
+
+def region_names(count):
+    names = BASE_REGIONS[:count]
+    return names + [f"Region {i}" for i in range(len(names) + 1, count + 1)]
+
+
+def product_names(count):
+    letters = [chr(ord('A') + i) for i in range(min(count, 26))]
+    return letters + [f"P{i}" for i in range(len(letters) + 1, count + 1)]
+
+
+def zipf_weights(count, skew):
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    return weights / weights.sum()
+
+
+def generate_block(rng, start_row, rows, total_rows, start_date, days, regions, products,
+                   region_weights, product_weights):
+    """One block of rows as a DataFrame."""
+    # Spread the dates evenly over the span, in file order
+    position = np.arange(start_row, start_row + rows)
+    day = position * days // max(total_rows, 1)
+    dates = start_date + pd.to_timedelta(day, unit='D')
+
+    # Sale values: log-normal around ~$1,000, whole dollars
+    revenue = np.maximum(rng.lognormal(mean=6.8, sigma=0.5, size=rows).round(), 1).astype('int64')
+
+    return pd.DataFrame({
+        'date': dates.strftime('%Y-%m-%d'),
+        'product': np.asarray(products, dtype=object)[rng.choice(len(products), rows, p=product_weights)],
+        'region': np.asarray(regions, dtype=object)[rng.choice(len(regions), rows, p=region_weights)],
+        'revenue': revenue,
+    })
+
+
+def generate(output, rows, regions=4, products=3, start='2024-01-01', days=365, skew=0.0, seed=0):
+    """Write `rows` synthetic sales to `output`; returns the path."""
+    rng = np.random.default_rng(seed)
+    region_list = region_names(regions)
+    product_list = product_names(products)
+    region_weights = zipf_weights(regions, skew)
+    product_weights = zipf_weights(products, skew)
+    start_date = pd.Timestamp(start)
+
+    folder = os.path.dirname(output)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    tmp = output + '.tmp'
+    with open(tmp, 'w', newline='') as f:
+        f.write('date,product,region,revenue\n')
+        for block_start in range(0, rows, BLOCK_ROWS):
+            block = generate_block(
+                rng, block_start, min(BLOCK_ROWS, rows - block_start), rows, start_date, days,
+                region_list, product_list, region_weights, product_weights,
+            )
+            block.to_csv(f, header=False, index=False)
+    os.replace(tmp, output)
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic sales data (date,product,region,revenue)")
+    parser.add_argument('--rows', default='1M', help="number of rows, e.g. 1000, 250k, 10M")
+    parser.add_argument('--regions', type=int, default=4, help="number of distinct regions")
+    parser.add_argument('--products', type=int, default=3, help="number of distinct products")
+    parser.add_argument('--start', default='2024-01-01', help="first sale date")
+    parser.add_argument('--days', type=int, default=365, help="number of days the sales span")
+    parser.add_argument('--skew', type=float, default=0.0,
+                        help="Zipf exponent for region/product popularity (0 = uniform)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="CSV to write (default: bench_data/sales_<rows>.csv)")
+    args = parser.parse_args(argv)
+
+    rows = parse_count(args.rows)
+    output = args.output or os.path.join('bench_data', f"sales_{args.rows}.csv")
+    generate(output, rows, args.regions, args.products, args.start, args.days, args.skew, args.seed)
+    print(f"✅ Wrote {rows:,} rows to {output}")
+
+
+if __name__ == '__main__':
+    main()
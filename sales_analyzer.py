@@ -0,0 +1,702 @@
+# Sales Performance Analyzer - importable dashboard API
+
+"""
+Use the dashboard from other code without running the whole report:
+
+    from sales_analyzer import SalesAnalyzer
+
+    analyzer = SalesAnalyzer("sales_data.csv")
+    analyzer.total_revenue           # loads + aggregates, nothing else
+    analyzer.region_ranking          # still no pivot / timeline work
+    print(analyzer.insights())       # one dashboard section as text
+    analyzer.export(".")             # the 7 export files
+
+Every metric is computed on first access and then remembered, so asking
+for a couple of numbers never pays for the timeline, the pivot or the
+market-share table.
+"""
+
+import os
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from sales_cache import load_sales, load_sales_chunks
+from sales_engine import TIMELINE_K, aggregate_csv, build_aggregate
+from sales_export import export_files
+from sales_forecast import MA_WINDOW, MODELS, SES_ALPHA, is_partial
+from sales_format import money, page, percent, ranks, text, timeline_lines
+from sales_io import CHUNKSIZE, SALES_FILE, resolve_input_paths
+from sales_parallel import aggregate_files
+from sales_sketch import RELATIVE_ACCURACY
+from sales_spill import aggregate_spilling
+from sales_state import STATE_FILE, append_update
+from sales_topn import rank
+from sales_trace import span
+
+RULE = "-" * 70
+BANNER = "=" * 70
+
+# Zero-sales (region, product) gaps listed by name; the rest are counted
+ZERO_SALES_LIMIT = 20
+
+# "Big-ticket" sales are above this revenue (must be a sales_cube.BAND_EDGES edge)
+BIG_TICKET = 1000
+
+EXPORT_FILES = [
+    'sales_metrics.csv',
+    'regional_performance.csv',
+    'product_performance.csv',
+    'region_product_matrix.csv',
+    'region_product_forecast.csv',
+    'sale_value_distribution.csv',
+    'executive_summary.txt',
+]
+
+
+class SalesAnalyzer:
+    """Lazy, memoized executive dashboard over a sales file (or folder / glob of files)."""
+
+    def __init__(self, source=SALES_FILE, chunksize=None, workers=None, use_cache=True,
+                 verify_cache=False, append=False, state_path=STATE_FILE, timeline_k=TIMELINE_K,
+                 backend='pandas', reader='pandas', memory_budget=None, spill_dir=None):
+        self.source = source
+        # 'pandas', or a SQL engine from sales_sql ('sqlite' / 'duckdb')
+        self.backend = backend
+        # CSV parser for the pandas backend: 'pandas' or 'pyarrow' (see sales_io)
+        self.reader = reader
+        self.chunksize = chunksize
+        self.workers = workers
+        self.use_cache = use_cache
+        self.verify_cache = verify_cache
+        self.append = append
+        self.state_path = state_path
+        self.timeline_k = timeline_k
+        # Bytes the keyed aggregate tables may use before spilling to disk (sales_spill)
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        # Filled in when the data is loaded
+        self.file_timings = []
+        self.append_note = None
+        self.spill_note = None
+
+    @classmethod
+    def from_frame(cls, df):
+        """Analyzer over an in-memory DataFrame (date, product, region, revenue)."""
+        return cls.from_aggregate(build_aggregate(df))
+
+    @classmethod
+    def from_aggregate(cls, agg):
+        """Analyzer over an aggregate that was built elsewhere."""
+        analyzer = cls(source=None)
+        analyzer.agg = agg
+        return analyzer
+
+    # ============================================
+    # LOAD DATA
+    # ============================================
+    @cached_property
+    def agg(self):
+        """The shared one-pass aggregate every metric reads from."""
+        with span('load', 'load') as s:
+            agg = self._load()
+            s.rows = agg.total_transactions
+        return agg
+
+    def _load(self):
+        if self.backend != 'pandas':
+            from sales_sql import aggregate_sql, open_backend
+            database = open_backend(self.backend, self.source)
+            try:
+                return aggregate_sql(database, timeline_k=self.timeline_k)
+            finally:
+                database.close()
+        if self.append:
+            agg, new_rows, mode = append_update(self.source, self.state_path,
+                                                chunksize=self.chunksize or CHUNKSIZE, timeline_k=self.timeline_k)
+            self.append_note = {
+                'append': f"+{new_rows:,} new sales merged into {self.state_path}",
+                'unchanged': f"no new sales since the last run ({self.state_path})",
+                'full': f"full recompute of {new_rows:,} sales saved to {self.state_path}",
+            }[mode]
+            return agg
+
+        paths = resolve_input_paths(self.source)
+        if self.memory_budget:
+            # Every file streamed in order through one out-of-core aggregation
+            chunks = (chunk for path in paths
+                      for chunk in load_sales_chunks(path, self.chunksize or CHUNKSIZE, use_cache=self.use_cache,
+                                                     verify=self.verify_cache, reader=self.reader))
+            agg, self.spill_note = aggregate_spilling(chunks, self.memory_budget, spill_dir=self.spill_dir,
+                                                      timeline_k=self.timeline_k)
+            return agg
+        if len(paths) > 1 or self.workers:
+            agg, self.file_timings = aggregate_files(paths, workers=self.workers, chunksize=self.chunksize,
+                                                     timeline_k=self.timeline_k, use_cache=self.use_cache,
+                                                     verify_cache=self.verify_cache, reader=self.reader)
+            return agg
+        if self.chunksize:
+            return aggregate_csv(self.source, chunksize=self.chunksize, timeline_k=self.timeline_k,
+                                 use_cache=self.use_cache, verify_cache=self.verify_cache, reader=self.reader)
+        return build_aggregate(load_sales(self.source, use_cache=self.use_cache, verify=self.verify_cache,
+                                          reader=self.reader))
+
+    # ============================================
+    # METRICS (each computed once, on first use)
+    # ============================================
+    @cached_property
+    def total_revenue(self):
+        return self.agg.total_revenue
+
+    @cached_property
+    def total_transactions(self):
+        return self.agg.total_transactions
+
+    @cached_property
+    def average_sale(self):
+        return self.agg.average_sale
+
+    @cached_property
+    def data_period(self):
+        return self.agg.earliest_date.strftime('%Y-%m-%d'), self.agg.latest_date.strftime('%Y-%m-%d')
+
+    @cached_property
+    def region_stats(self):
+        return self.agg.region_stats
+
+    @cached_property
+    def product_stats(self):
+        return self.agg.product_stats
+
+    @cached_property
+    def region_ranking(self):
+        return rank(self.region_stats['sum'])
+
+    @cached_property
+    def product_ranking(self):
+        return rank(self.product_stats['sum'])
+
+    @cached_property
+    def top_region(self):
+        # (region, revenue, % of total)
+        region = self.region_stats['sum'].idxmax()
+        revenue = self.region_stats.loc[region, 'sum']
+        return region, revenue, revenue / self.total_revenue * 100
+
+    @cached_property
+    def top_product(self):
+        # (product, revenue, % of total)
+        product = self.product_stats['sum'].idxmax()
+        revenue = self.product_stats.loc[product, 'sum']
+        return product, revenue, revenue / self.total_revenue * 100
+
+    @cached_property
+    def product_performance(self):
+        # Indicator: ±20% around the overall average sale
+        avg = self.product_stats['mean']
+        return pd.Series(
+            np.select(
+                [avg > self.average_sale * 1.2, avg < self.average_sale * 0.8],
+                ["🟢 Strong", "🔴 Needs attention"],
+                default="🟡 Average",
+            ),
+            index=self.product_stats.index,
+        )
+
+    # ----------------------------------------
+    # Sale-value distribution (from the sketches)
+    # ----------------------------------------
+    @cached_property
+    def sale_quantiles(self):
+        # p50 / p90 / p99 of all sales
+        return self.agg.sketches.quantiles()
+
+    @cached_property
+    def region_quantiles(self):
+        return self.agg.sketches.quantiles(by='region').reindex(self.region_stats.index)
+
+    @cached_property
+    def product_quantiles(self):
+        return self.agg.sketches.quantiles(by='product').reindex(self.product_stats.index)
+
+    def _big_ticket_share(self, by=None):
+        # % of sales above BIG_TICKET, from the revenue-band histogram
+        histogram = self.agg.sketches.histogram(by)
+        edges = self.agg.sketches.edges
+        big = [label for label, low in zip(histogram.index if by is None else histogram.columns, edges)
+               if low >= BIG_TICKET]
+        if by is None:
+            return histogram[big].sum() / histogram.sum() * 100
+        return histogram[big].sum(axis=1) / histogram.sum(axis=1) * 100
+
+    @cached_property
+    def big_ticket_share(self):
+        return self._big_ticket_share()
+
+    def _big_ticket_flags(self, shares):
+        # Indicator: ±20% around the share of big-ticket sales overall
+        return pd.Series(
+            np.select(
+                [shares > self.big_ticket_share * 1.2, shares < self.big_ticket_share * 0.8],
+                ["🟢 More big-ticket sales", "🔴 Fewer big-ticket sales"],
+                default="🟡 Typical mix",
+            ),
+            index=shares.index,
+        )
+
+    @cached_property
+    def region_big_ticket(self):
+        # (share %, flag) per region
+        shares = self._big_ticket_share('region').reindex(self.region_stats.index)
+        return shares, self._big_ticket_flags(shares)
+
+    @cached_property
+    def product_big_ticket(self):
+        shares = self._big_ticket_share('product').reindex(self.product_stats.index)
+        return shares, self._big_ticket_flags(shares)
+
+    @cached_property
+    def distribution(self):
+        """Sale-value distribution per region, per product and overall (export table)."""
+        sketches = self.agg.sketches
+        parts = []
+        for scope in ('region', 'product', None):
+            sales = sketches.histogram(scope)
+            if scope is None:
+                table = pd.DataFrame([{
+                    'scope': 'all', 'name': 'All sales', 'sales': sales.sum(),
+                    **self.sale_quantiles.round(2), 'active_days': sketches.distinct_days(),
+                    **sales,
+                }])
+            else:
+                table = pd.concat([
+                    sketches.quantiles(by=scope).round(2),
+                    sketches.distinct_days(by=scope),
+                    sales,
+                ], axis=1)
+                table.insert(0, 'sales', sales.sum(axis=1))
+                table.insert(0, 'name', table.index.astype(str))
+                table.insert(0, 'scope', scope)
+            parts.append(table)
+        return pd.concat(parts, ignore_index=True)
+
+    @cached_property
+    def revenue_pivot(self):
+        return self.agg.revenue_pivot
+
+    @cached_property
+    def best_product_by_region(self):
+        return self.agg.best_product_by_region
+
+    @cached_property
+    def zero_sales(self):
+        # The first ZERO_SALES_LIMIT gaps - with thousands of products there can be millions
+        return self.agg.sparse_pivot.zero_cells(limit=ZERO_SALES_LIMIT)
+
+    @cached_property
+    def zero_sales_count(self):
+        return self.agg.sparse_pivot.zero_count
+
+    @cached_property
+    def monthly_revenue(self):
+        return self.agg.monthly_revenue
+
+    @cached_property
+    def best_month(self):
+        # (month name, revenue)
+        return self.monthly_revenue.idxmax(), self.monthly_revenue.max()
+
+    @cached_property
+    def market_share(self):
+        """Long table: product, region, revenue, share (% of the product's total)."""
+        product_totals = self.product_stats.loc[self.agg.products_in_order, 'sum']
+        product_totals = product_totals[product_totals > 0]
+        share_table = self.revenue_pivot.loc[self.agg.regions_in_order, product_totals.index].T
+        market_share = share_table.div(product_totals, axis=0) * 100
+        return pd.DataFrame({'revenue': share_table.stack(), 'share': market_share.stack()}).reset_index()
+
+    @cached_property
+    def growth(self):
+        # (previous quarter, latest quarter, growth %) - quarter over quarter
+        quarters = self.agg.quarter_totals
+        if len(quarters) < 2:
+            return None
+        (previous_label, previous), (latest_label, latest) = quarters.iloc[-2:].items()
+        if previous_label != latest_label - 1:
+            # A quarter with no sales at all in between
+            previous_label, previous = latest_label - 1, 0
+        rate = ((latest - previous) / previous) * 100 if previous > 0 else 0
+        latest_name = str(latest_label)
+        if self.agg.latest_date < latest_label.end_time.normalize():
+            latest_name += f", through {self.agg.latest_date:%Y-%m-%d}"
+        return (str(previous_label), previous), (latest_name, latest), rate
+
+    @cached_property
+    def concentration(self):
+        # (revenue of the top 2 sales, % of total)
+        top_2_sales = self.agg.top_sales_total(2)
+        return top_2_sales, top_2_sales / self.total_revenue * 100
+
+    @cached_property
+    def monthly_average(self):
+        return self.total_revenue / self.agg.month_count
+
+    @cached_property
+    def forecast(self):
+        """Next month's revenue per region × product, one column per model."""
+        return self.agg.forecast
+
+    @cached_property
+    def forecast_total(self):
+        # (month, last date if that month is in progress else None, {model: total forecast revenue})
+        month = pd.Period(self.forecast['month'].iloc[0], freq='M')
+        through = None
+        if month.start_time <= self.agg.latest_date and is_partial(month, self.agg.latest_date):
+            through = f"{self.agg.latest_date:%Y-%m-%d}"
+        return str(month), through, self.forecast[MODELS].sum()
+
+    # ============================================
+    # DASHBOARD SECTIONS (each returns its text)
+    # ============================================
+    def header(self):
+        return "\n".join([BANNER, "SALES PERFORMANCE ANALYZER - EXECUTIVE DASHBOARD", BANNER])
+
+    def load_report(self):
+        """How the data was loaded (incremental / multi-file / spilling runs); '' otherwise."""
+        self.agg
+        lines = []
+        if self.append_note:
+            lines += ["", f"🔁 Incremental update: {self.append_note}"]
+        if self.spill_note:
+            lines += ["", f"💽 Out-of-core aggregation: {self.spill_note}"]
+        if self.file_timings:
+            lines += ["", f"⏱️  Loaded {len(self.file_timings)} files:"]
+            slowest = sorted(self.file_timings, key=lambda t: t[1], reverse=True)
+            lines += [f"  {seconds:8.3f}s  {rows:>12,} rows  {path}" for path, seconds, rows in slowest[:10]]
+            if len(slowest) > 10:
+                lines.append(f"  ... {len(slowest) - 10} more files")
+        return "\n".join(lines)
+
+    def summary(self):
+        # SECTION 1: EXECUTIVE SUMMARY
+        earliest, latest = self.data_period
+        return "\n".join([
+            "",
+            "📊 EXECUTIVE SUMMARY",
+            RULE,
+            f"Total Revenue: ${self.total_revenue:,.0f}",
+            f"Total Transactions: {self.total_transactions}",
+            f"Average Sale Value: ${self.average_sale:,.2f}",
+            f"Data Period: {earliest} to {latest}",
+        ])
+
+    def regional(self):
+        # SECTION 2: REGIONAL PERFORMANCE (one block of lines per region)
+        stats = self.region_stats
+        percentage = stats['sum'] / self.total_revenue * 100
+        blocks = (
+            '\nRegion: ' + text(stats.index)
+            + '\n  Total Revenue: $' + money(stats['sum']) + ' (' + percent(percentage) + '%)'
+            + '\n  Transactions: ' + text(stats['count'])
+            + '\n  Avg Sale Value: $' + money(stats['mean'], 2)
+            + _quantile_line(self.region_quantiles)
+            + _big_ticket_line(*self.region_big_ticket)
+        )
+        return "\n".join(["", "🌍 REGIONAL PERFORMANCE ANALYSIS", RULE, *blocks])
+
+    def products(self):
+        # SECTION 3: PRODUCT PERFORMANCE
+        stats = self.product_stats
+        percentage = stats['sum'] / self.total_revenue * 100
+        blocks = (
+            '\nProduct ' + text(stats.index) + ':'
+            + '\n  Total Revenue: $' + money(stats['sum']) + ' (' + percent(percentage) + '%)'
+            + '\n  Transactions: ' + text(stats['count'])
+            + '\n  Avg Sale Value: $' + money(stats['mean'], 2)
+            + _quantile_line(self.product_quantiles)
+            + _big_ticket_line(*self.product_big_ticket)
+            + '\n  Performance: ' + self.product_performance
+        )
+        return "\n".join(["", "📦 PRODUCT PERFORMANCE ANALYSIS", RULE, *blocks])
+
+    def pivot(self):
+        # SECTION 4: CROSS-ANALYSIS (PIVOT TABLE)
+        best = self.best_product_by_region
+        return "\n".join([
+            "",
+            "🔍 REGIONAL PRODUCT BREAKDOWN",
+            RULE,
+            "",
+            "🔄 REGIONAL × PRODUCT ANALYSIS",
+            RULE,
+            "Revenue by Region and Product:",
+            str(self.revenue_pivot),
+            "",
+            "Top product in each region:",
+            *('  ' + text(best.index) + ': Product ' + text(best['product'])
+              + ' ($' + money(best['revenue']) + ')'),
+        ])
+
+    def timeline(self, limit=None, page_number=1):
+        # SECTION 5: TIME-BASED ANALYSIS
+        agg = self.agg
+        sales_by_date = page(agg.timeline, limit, page_number)
+        lines = ["", "📅 SALES TIMELINE", RULE, "Chronological sales:", *timeline_lines(sales_by_date)]
+
+        if len(sales_by_date) < agg.total_transactions:
+            first_shown = (page_number - 1) * (limit or 0) + 1
+            if len(sales_by_date):
+                lines.append(f"  ... showing sales {first_shown:,}-{first_shown + len(sales_by_date) - 1:,}"
+                             f" of {agg.total_transactions:,}")
+            else:
+                kept = f", only the earliest {len(agg.timeline):,} kept" if agg.timeline_truncated else ""
+                lines.append(f"  ... no sales on this page ({agg.total_transactions:,} in total{kept})")
+
+        monthly = self.monthly_revenue
+        best_month, best_revenue = self.best_month
+        lines += ["", "Sales by Month:", *('  ' + text(monthly.index) + ': $' + money(monthly))]
+        lines += ["", f"Highest revenue month: {best_month} (${best_revenue:,.0f})"]
+        return "\n".join(lines)
+
+    def insights(self):
+        # SECTION 6: KEY INSIGHTS & RECOMMENDATIONS
+        top_region, top_region_revenue, top_region_pct = self.top_region
+        top_product, top_product_revenue, top_product_pct = self.top_product
+        agg = self.agg
+        best = self.best_product_by_region
+        quantiles = self.sale_quantiles
+        lines = [
+            "",
+            "💡 KEY INSIGHTS",
+            RULE,
+            "",
+            f"🎯 Top Region: {top_region}",
+            f"   Generates ${top_region_revenue:,.0f} ({top_region_pct:.1f}% of total revenue)",
+            "",
+            f"🎯 Top Product: Product {top_product}",
+            f"   Generates ${top_product_revenue:,.0f} ({top_product_pct:.1f}% of total revenue)",
+            "",
+            "⚠️  Performance Gaps:",
+            *(f"   Product {product} has ZERO sales in {region} region" for region, product in self.zero_sales),
+            *self._more_gaps("   "),
+            "",
+            "📊 Sale Value Analysis:",
+            f"   Highest sale: ${agg.highest_sale:,.0f}",
+            f"   Lowest sale: ${agg.lowest_sale:,.0f}",
+            f"   Average sale: ${self.average_sale:,.2f}",
+            f"   Median / P90 / P99: ${quantiles['p50']:,.0f} / ${quantiles['p90']:,.0f} / ${quantiles['p99']:,.0f}"
+            f" (±{RELATIVE_ACCURACY:.0%})",
+            f"   Sales over ${BIG_TICKET:,}: {self.big_ticket_share:.1f}%",
+            f"   Variance: ${agg.highest_sale - agg.lowest_sale:,.0f} gap between high and low",
+            "",
+            "🎯 STRATEGIC RECOMMENDATIONS:",
+            "",
+            f"1. Double down on {top_region} region and Product {top_product}",
+            f"   These drive {top_region_pct + top_product_pct:.1f}% of revenue combined",
+        ]
+        if self.zero_sales:
+            lines += ["", "2. Investigate why these combinations have zero sales:"]
+            lines += [f"   - Product {product} in {region}" for region, product in self.zero_sales]
+            lines += self._more_gaps("   - ")
+        lines += ["", "3. Region-specific product focus:"]
+        lines += list(
+            '   ' + text(best.index) + ': Focus on Product ' + text(best['product'])
+            + ' (proven $' + money(best['revenue']) + ' performer)'
+        )
+        return "\n".join(lines)
+
+    def _more_gaps(self, prefix):
+        hidden = self.zero_sales_count - len(self.zero_sales)
+        return [f"{prefix}... and {hidden:,} more zero-sales combinations"] if hidden > 0 else []
+
+    def advanced(self):
+        # BONUS: ADVANCED ANALYSIS
+        lines = ["", "🔬 ADVANCED METRICS (BONUS)", RULE, "", "1️⃣ Product Market Share by Region:"]
+
+        # 1. Market share - each product header followed by its region lines
+        shares = self.market_share
+        product_totals = self.product_stats.loc[shares['product'].unique(), 'sum']
+        region_lines = (
+            '  ' + text(shares['region']) + ': $' + money(shares['revenue'])
+            + ' (' + percent(shares['share']) + '%)'
+        )
+        product_headers = '\nProduct ' + text(product_totals.index) + ' (Total: $' + money(product_totals) + '):'
+        lines += list(np.column_stack([
+            product_headers.to_numpy(),
+            region_lines.to_numpy().reshape(len(product_totals), -1),
+        ]).ravel())
+
+        # 2. Growth analysis - latest quarter vs the one before
+        lines += ["", "2️⃣ Growth Analysis:"]
+        if self.growth is None:
+            lines.append("  Not enough history (needs two quarters)")
+        else:
+            (previous_label, previous), (latest_label, latest), growth_rate = self.growth
+            trend = '📈' if growth_rate > 0 else '📉' if growth_rate < 0 else '➡️'
+            lines += [
+                f"  Previous quarter ({previous_label}): ${previous:,.0f}",
+                f"  Latest quarter ({latest_label}): ${latest:,.0f}",
+                f"  Growth: {growth_rate:+.1f}% {trend}",
+            ]
+
+        # 3. Revenue concentration
+        top_2_sales, concentration = self.concentration
+        lines += [
+            "",
+            "3️⃣ Revenue Concentration:",
+            f"  Top 2 sales: ${top_2_sales:,.0f} ({concentration:.1f}% of total)",
+            f"  {'⚠️ HIGH concentration' if concentration > 50 else '✅ Well-distributed'}",
+        ]
+
+        # 4. Forecast
+        month, through, totals = self.forecast_total
+        heading = f"Next month projection ({month})"
+        if through:
+            # The partial month is forecast from the complete ones, not fitted
+            heading = f"Projection for {month} (in progress, through {through})"
+        lines += [
+            "",
+            "4️⃣ Revenue Forecast:",
+            f"  Monthly average: ${self.monthly_average:,.2f}",
+            f"  {heading}, summed over region × product:",
+            f"    {MA_WINDOW}-month moving average: ${totals['moving_average']:,.2f}",
+            f"    Exponential smoothing (α={SES_ALPHA}): ${totals['exp_smoothing']:,.2f}",
+            f"    Linear trend: ${totals['linear_trend']:,.2f}",
+        ]
+
+        # 5. Rankings
+        regions, products = self.region_ranking, self.product_ranking
+        lines += ["", "5️⃣ Performance Rankings:", "", "Top Regions:"]
+        lines += list('  #' + ranks(regions) + ' ' + text(regions.index) + ': $' + money(regions))
+        lines += ["", "Top Products:"]
+        lines += list('  #' + ranks(products) + ' Product ' + text(products.index) + ': $' + money(products))
+        return "\n".join(lines)
+
+    def sections(self, timeline_limit=None, timeline_page=1):
+        """All dashboard sections, in order, as text."""
+        rows = self.total_transactions
+        renderers = [
+            ('summary', self.summary),
+            ('regional', self.regional),
+            ('products', self.products),
+            ('pivot', self.pivot),
+            ('timeline', lambda: self.timeline(timeline_limit, timeline_page)),
+            ('insights', self.insights),
+            ('advanced', self.advanced),
+        ]
+        texts = []
+        for name, render in renderers:
+            with span(name, 'section', rows):
+                texts.append(render())
+        return texts
+
+    def dashboard(self, timeline_limit=None, timeline_page=1):
+        """The whole dashboard as one string."""
+        parts = [self.header(), self.load_report(), *self.sections(timeline_limit, timeline_page)]
+        return "\n".join(part for part in parts if part)
+
+    # ============================================
+    # EXPORT RESULTS
+    # ============================================
+    def metrics_table(self):
+        top_region = self.top_region[0]
+        top_product = self.top_product[0]
+        return pd.DataFrame({
+            'Metric': [
+                'Total Revenue',
+                'Total Transactions',
+                'Average Sale Value',
+                'Top Region',
+                'Top Product',
+                'Highest Month',
+            ],
+            'Value': [
+                f'${self.total_revenue:,.0f}',
+                self.total_transactions,
+                f'${self.average_sale:,.2f}',
+                top_region,
+                f'Product {top_product}',
+                self.best_month[0],
+            ],
+        })
+
+    def executive_summary(self):
+        """Text of executive_summary.txt."""
+        earliest, latest = self.data_period
+        top_region, top_region_revenue, top_region_pct = self.top_region
+        top_product, top_product_revenue, top_product_pct = self.top_product
+        best_month, best_month_revenue = self.best_month
+        zero_sales = [f"Product {product} in {region}" for region, product in self.zero_sales]
+
+        lines = [
+            BANNER,
+            "SALES PERFORMANCE ANALYSIS - EXECUTIVE SUMMARY",
+            BANNER,
+            "",
+            "KEY METRICS",
+            RULE,
+            f"Total Revenue: ${self.total_revenue:,.0f}",
+            f"Total Transactions: {self.total_transactions}",
+            f"Average Sale Value: ${self.average_sale:,.2f}",
+            f"Data Period: {earliest} to {latest}",
+            "",
+            "TOP PERFORMERS",
+            RULE,
+            f"Best Region: {top_region} (${top_region_revenue:,.0f}, {top_region_pct:.1f}%)",
+            f"Best Product: Product {top_product} (${top_product_revenue:,.0f}, {top_product_pct:.1f}%)",
+            f"Best Month: {best_month} (${best_month_revenue:,.0f})",
+            "",
+            "STRATEGIC RECOMMENDATIONS",
+            RULE,
+            f"1. Focus resources on {top_region} region and Product {top_product}",
+            "2. Investigate zero-sales combinations:",
+            *(f"   - {item}" for item in zero_sales[:3]),
+            "3. Leverage region-specific strengths:",
+            *(f"   - {region}: Product {best}" for region, best in self.best_product_by_region['product'].items()),
+            "",
+            BANNER,
+            "END OF REPORT",
+            BANNER,
+        ]
+        return "\n".join(lines) + "\n"
+
+    def render_exports(self):
+        """The 7 export files as {file name: bytes}, in EXPORT_FILES order."""
+        rows = self.total_transactions
+        renderers = {
+            'sales_metrics.csv': lambda: self.metrics_table().to_csv(index=False),
+            'regional_performance.csv': lambda: self.region_stats.to_csv(),
+            'product_performance.csv': lambda: self.product_stats.to_csv(),
+            'region_product_matrix.csv': lambda: self.agg.sparse_pivot.to_csv(),
+            'region_product_forecast.csv': lambda: self.forecast.to_csv(index=False),
+            'sale_value_distribution.csv': lambda: self.distribution.to_csv(index=False),
+            'executive_summary.txt': self.executive_summary,
+        }
+        rendered = {}
+        for name in EXPORT_FILES:
+            with span(f'export:{name}', 'export', rows):
+                rendered[name] = renderers[name]().encode('utf-8')
+        return rendered
+
+    def export(self, folder='.', force=False):
+        """Write the 7 export files into `folder`, skipping unchanged ones.
+
+        Returns {path: 'written' | 'unchanged'}; force=True rewrites all.
+        """
+        os.makedirs(folder, exist_ok=True)
+        rendered = self.render_exports()
+        with span('export:write', 'export', len(rendered)):
+            return export_files(folder, rendered, force=force)
+
+
+def _quantile_line(quantiles):
+    # '\n  Median / P90 / P99: $a / $b / $c' per group (sketch estimates)
+    return (
+        '\n  Median / P90 / P99: $' + money(quantiles['p50'])
+        + ' / $' + money(quantiles['p90']) + ' / $' + money(quantiles['p99'])
+    )
+
+
+def _big_ticket_line(shares, flags):
+    return f'\n  Sales over ${BIG_TICKET:,}: ' + percent(shares) + '% - ' + flags
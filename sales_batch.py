@@ -0,0 +1,163 @@
+# Batch dashboards: one load, one grouped aggregation, a dashboard per partition
+
+"""
+Running portfolio_project.py once per store (or tenant, or store group)
+re-reads the master file and re-aggregates a filtered copy every time.
+Batch mode reads the file once and adds the partition column to the
+engine's group-by keys:
+
+    SELECT store, region, product, month, SUM(revenue), COUNT(*), ...
+    FROM sales
+    GROUP BY store, region, product, month
+
+The cells of every partition then come out of that ONE group-by (and the
+daily table out of one more), already sorted by partition, so splitting
+them is slicing. The rows are put in partition order once, with a stable
+sort, to pick each partition's top sales and timeline. The dashboards and
+export files are rendered in a process pool, one output folder per
+partition:
+
+    python portfolio_project.py --input master.csv --partition-by store
+    out/store=North-01/dashboard.txt, sales_metrics.csv, ...
+
+Each partition's output is the same as a run on a file holding only that
+partition's rows.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from sales_engine import ROW_COLUMNS, TIMELINE_K, TOP_K, SalesAggregate, group_rows
+from sales_io import DATE_COLUMNS, SALES_DTYPES, apply_schema, resolve_input_paths
+from sales_sketch import SaleSketches
+from sales_trace import span
+
+DASHBOARD_FILE = 'dashboard.txt'
+
+
+# ============================================
+# LOADING WITH THE PARTITION COLUMN
+# ============================================
+def iter_partitioned_chunks(source, key, chunksize=None):
+    """The sales rows plus the `key` column, as one frame or chunks.
+
+    The columnar cache only holds the four sales columns, so this reads
+    the CSV text.
+    """
+    dtype = {**SALES_DTYPES, key: 'category'}
+    for path in resolve_input_paths(source):
+        if chunksize:
+            with pd.read_csv(path, dtype=dtype, parse_dates=DATE_COLUMNS, chunksize=chunksize) as reader:
+                for chunk in reader:
+                    yield _check_key(apply_schema(chunk), key, path)
+        else:
+            yield _check_key(apply_schema(pd.read_csv(path, dtype=dtype, parse_dates=DATE_COLUMNS)), key, path)
+
+
+def _check_key(df, key, path):
+    if key not in df.columns:
+        raise ValueError(f"{path} has no '{key}' column to partition by")
+    if df[key].isna().any():
+        raise ValueError(f"{path} has rows with no '{key}' value")
+    return df
+
+
+# ============================================
+# ONE GROUPED AGGREGATION, SPLIT BY PARTITION
+# ============================================
+def partition_aggregates(df, key, top_k=TOP_K, timeline_k=None):
+    """{partition value: SalesAggregate} for a frame with a `key` column."""
+    codes, partitions = pd.factorize(df[key], sort=True)
+    # Rows in partition order (file order within each), numbered per partition
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(partitions) + 1))
+    starts = np.repeat(bounds[:-1], np.diff(bounds))
+    df = df.take(order).reset_index(drop=True)
+    df[key] = pd.Categorical.from_codes(codes[order], categories=partitions)
+
+    with span('partition:aggregate', 'load', len(df)):
+        rows, cells, daily = group_rows(df, np.arange(len(df)) - starts, by=[key])
+
+    cell_bounds = _level_bounds(cells.index, len(partitions))
+    daily_bounds = _level_bounds(daily.index, len(partitions))
+
+    aggregates = {}
+    for i, partition in enumerate(partitions):
+        part_rows = rows.iloc[bounds[i]:bounds[i + 1]]
+        part_daily = daily.iloc[daily_bounds[i]:daily_bounds[i + 1]].droplevel(key)
+        aggregates[partition] = SalesAggregate(
+            cells.iloc[cell_bounds[i]:cell_bounds[i + 1]].droplevel(key),
+            len(part_rows),
+            rows=part_rows[ROW_COLUMNS],
+            top_k=top_k,
+            timeline_k=timeline_k,
+            daily=part_daily,
+            sketches=SaleSketches.from_rows(part_rows['region'], part_rows['product'], part_rows['revenue'],
+                                            part_daily),
+        )
+    return aggregates
+
+
+def _level_bounds(index, n):
+    # Where each partition's entries start in a table sorted by partition first
+    return np.searchsorted(index.codes[0], np.arange(n + 1))
+
+
+def aggregate_partitions(source, key, chunksize=None, top_k=TOP_K, timeline_k=TIMELINE_K):
+    """{partition value: SalesAggregate} for every `key` value in the input.
+
+    With a chunksize the input is streamed and each partition's partial
+    aggregates are merged (memory ~ distinct keys, and the earliest
+    `timeline_k` sales per partition).
+    """
+    merged = {}
+    for chunk in iter_partitioned_chunks(source, key, chunksize):
+        for partition, agg in partition_aggregates(chunk, key, top_k, timeline_k if chunksize else None).items():
+            merged[partition] = agg if partition not in merged else merged[partition].merge(agg)
+    if not merged:
+        raise ValueError("no sales rows to aggregate")
+    return merged
+
+
+# ============================================
+# RENDERING AND WRITING, IN PARALLEL
+# ============================================
+def partition_folder(output_dir, key, partition):
+    """out/<key>=<value>, with the value made safe for a folder name."""
+    value = re.sub(r'[^\w.-]+', '_', str(partition)).strip('.') or '_'
+    return os.path.join(output_dir, f'{key}={value}')
+
+
+def _write_partition(agg, folder, force):
+    # Runs inside a worker process
+    from sales_analyzer import SalesAnalyzer
+    from sales_export import export_files
+
+    analyzer = SalesAnalyzer.from_aggregate(agg)
+    rendered = {DASHBOARD_FILE: (analyzer.dashboard() + '\n').encode('utf-8'), **analyzer.render_exports()}
+    status = export_files(folder, rendered, force=force)
+    return agg.total_transactions, agg.total_revenue, status
+
+
+def write_partitions(aggregates, output_dir, key, workers=None, force=False):
+    """Dashboard + export files of every partition into its own folder.
+
+    Returns [(partition, folder, rows, revenue, {path: 'written' | 'unchanged'})].
+    """
+    folders = {partition: partition_folder(output_dir, key, partition) for partition in aggregates}
+    if len(set(folders.values())) < len(folders):
+        raise ValueError(f"two '{key}' values map to the same folder name under {output_dir}")
+    workers = workers or os.cpu_count() or 1
+    args = [(agg, folders[partition], force) for partition, agg in aggregates.items()]
+
+    with span('partition:write', 'export', len(args)):
+        if workers == 1 or len(args) == 1:
+            results = [_write_partition(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(args))) as pool:
+                results = list(pool.map(_write_partition, *zip(*args)))
+    return [(partition, folders[partition], *result) for partition, result in zip(aggregates, results)]
@@ -0,0 +1,265 @@
+# Columnar binary cache for parsed sales files
+
+"""
+Parsing CSV text (and the date column) is the biggest fixed cost of a run.
+After the first parse we keep a typed, column-by-column copy next to the
+source file:
+
+    .sales_cache/<file name>/
+        meta.json          source size/mtime/sha256, row count, categories
+        region.bin         int32 category codes
+        product.bin        int32 category codes
+        date.bin           datetime64[ns]
+        revenue.bin        smallest integer type that fits (int8..int64)
+
+Later runs memory-map those files instead of parsing. The cache is thrown
+away automatically when the source file's size or mtime changes, or - with
+verify=True - when its content hash no longer matches.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from sales_io import CHUNKSIZE, iter_sales_chunks, read_sales
+
+CACHE_DIR = '.sales_cache'
+CACHE_VERSION = 2
+
+CATEGORY_COLUMNS = ['region', 'product']
+COLUMN_DTYPES = {
+    'date': 'datetime64[ns]',
+    'product': 'int32',
+    'region': 'int32',
+    'revenue': 'int64',
+}
+
+
+def cache_dir_for(path):
+    folder, name = os.path.split(os.path.abspath(path))
+    return os.path.join(folder, CACHE_DIR, name)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_stat(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(cache_dir_for(path), 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_cache_valid(path, verify=False):
+    """True if the cache matches the source file's size, mtime (and hash if verify)."""
+    meta = _read_meta(path)
+    if meta is None or meta.get('version') != CACHE_VERSION:
+        return False
+    if meta['source'] != _source_stat(path):
+        return False
+    return not verify or meta['sha256'] == file_sha256(path)
+
+
+# ============================================
+# WRITING
+# ============================================
+class _CacheWriter:
+    """Appends parsed chunks to the column files of a new cache."""
+
+    def __init__(self, path):
+        self.path = path
+        self.target = cache_dir_for(path)
+        self.tmp = self.target + '.tmp'
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        os.makedirs(self.tmp)
+        self.files = {col: open(os.path.join(self.tmp, f'{col}.bin'), 'wb') for col in COLUMN_DTYPES}
+        self.categories = {col: {} for col in CATEGORY_COLUMNS}
+        self.rows = 0
+        self.revenue_range = None
+        # Taken BEFORE we read, so a file changed mid-parse looks stale next time
+        self.source = _source_stat(path)
+
+    def append(self, chunk):
+        if not pd.api.types.is_integer_dtype(chunk['revenue']):
+            raise TypeError("only integer revenue is cached")
+
+        for col in CATEGORY_COLUMNS:
+            codes, uniques = pd.factorize(chunk[col])
+            lookup = self.categories[col]
+            global_codes = np.array([lookup.setdefault(value, len(lookup)) for value in uniques] + [-1],
+                                    dtype='int32')
+            # factorize marks missing values as -1, which indexes the trailing -1
+            global_codes[codes].tofile(self.files[col])
+
+        pd.to_datetime(chunk['date']).to_numpy(dtype='datetime64[ns]').tofile(self.files['date'])
+        revenue = chunk['revenue'].to_numpy(dtype='int64')
+        revenue.tofile(self.files['revenue'])
+        if len(revenue):
+            low, high = int(revenue.min()), int(revenue.max())
+            if self.revenue_range is not None:
+                low, high = min(low, self.revenue_range[0]), max(high, self.revenue_range[1])
+            self.revenue_range = (low, high)
+        self.rows += len(chunk)
+
+    def commit(self):
+        for f in self.files.values():
+            f.close()
+
+        # Codes were handed out in first-seen order; re-number them so the
+        # categories are sorted and GROUP BY output keeps its usual A-Z order
+        categories = {}
+        for col, lookup in self.categories.items():
+            values = list(lookup)
+            order = sorted(range(len(values)), key=values.__getitem__)
+            categories[col] = [values[i] for i in order]
+            if self.rows and order != list(range(len(order))):
+                remap = np.empty(len(order) + 1, dtype='int32')
+                remap[order] = np.arange(len(order), dtype='int32')
+                remap[-1] = -1
+                codes = np.memmap(os.path.join(self.tmp, f'{col}.bin'), dtype='int32', mode='r+')
+                codes[:] = remap[codes]
+                codes.flush()
+                del codes
+
+        # Shrink revenue to the smallest integer type that holds every value
+        revenue_dtype = _smallest_int(*(self.revenue_range or (0, 0)))
+        if self.rows and revenue_dtype != 'int64':
+            revenue_file = os.path.join(self.tmp, 'revenue.bin')
+            wide = np.memmap(revenue_file, dtype='int64', mode='r')
+            with open(revenue_file + '.narrow', 'wb') as f:
+                for start in range(0, self.rows, CHUNKSIZE):
+                    wide[start:start + CHUNKSIZE].astype(revenue_dtype).tofile(f)
+            del wide
+            os.replace(revenue_file + '.narrow', revenue_file)
+
+        meta = {
+            'version': CACHE_VERSION,
+            'source': self.source,
+            'sha256': file_sha256(self.path),
+            'rows': self.rows,
+            'categories': categories,
+            'revenue_dtype': revenue_dtype,
+        }
+        with open(os.path.join(self.tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        shutil.rmtree(self.target, ignore_errors=True)
+        os.replace(self.tmp, self.target)
+
+    def abandon(self):
+        for f in self.files.values():
+            f.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def _smallest_int(low, high):
+    for dtype in ('int8', 'int16', 'int32'):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return 'int64'
+
+
+def _open_writer(path):
+    try:
+        return _CacheWriter(path)
+    except OSError:
+        # Read-only data folder - just run without a cache
+        return None
+
+
+# ============================================
+# READING
+# ============================================
+def _memmap_columns(path):
+    folder = cache_dir_for(path)
+    meta = _read_meta(path)
+    rows = meta['rows']
+    columns = {}
+    dtypes = dict(COLUMN_DTYPES, revenue=meta['revenue_dtype'])
+    for col, dtype in dtypes.items():
+        if rows == 0:
+            columns[col] = np.empty(0, dtype=dtype)
+        else:
+            columns[col] = np.memmap(os.path.join(folder, f'{col}.bin'), dtype=dtype, mode='r', shape=(rows,))
+    return columns, meta
+
+
+def _frame(columns, categories, start=0, stop=None):
+    data = {}
+    for col in COLUMN_DTYPES:
+        values = columns[col][start:stop]
+        if col in categories:
+            values = pd.Categorical.from_codes(values, categories=categories[col])
+        data[col] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def read_cached(path):
+    """Whole sales file from the cache (region/product come back as categoricals)."""
+    columns, meta = _memmap_columns(path)
+    return _frame(columns, meta['categories'])
+
+
+def iter_cached_chunks(path, chunksize=CHUNKSIZE):
+    columns, meta = _memmap_columns(path)
+    for start in range(0, meta['rows'], chunksize):
+        yield _frame(columns, meta['categories'], start, start + chunksize)
+
+
+def load_sales(path, use_cache=True, verify=False, reader='pandas'):
+    """read_sales() that goes through the columnar cache."""
+    if use_cache and is_cache_valid(path, verify):
+        return read_cached(path)
+
+    df = read_sales(path, reader=reader)
+    writer = _open_writer(path) if use_cache else None
+    if writer is not None:
+        try:
+            writer.append(df)
+            writer.commit()
+        except (OSError, TypeError):
+            writer.abandon()
+    return df
+
+
+def load_sales_chunks(path, chunksize=CHUNKSIZE, use_cache=True, verify=False, reader='pandas'):
+    """iter_sales_chunks() that reads from - or builds - the columnar cache."""
+    if use_cache and is_cache_valid(path, verify):
+        yield from iter_cached_chunks(path, chunksize)
+        return
+
+    writer = _open_writer(path) if use_cache else None
+    try:
+        for chunk in iter_sales_chunks(path, chunksize, reader=reader):
+            if writer is not None:
+                try:
+                    writer.append(chunk)
+                except (OSError, TypeError):
+                    writer.abandon()
+                    writer = None
+            yield chunk
+    except BaseException:
+        if writer is not None:
+            writer.abandon()
+        raise
+
+    if writer is not None:
+        try:
+            writer.commit()
+        except OSError:
+            writer.abandon()
@@ -0,0 +1,243 @@
+# Precomputed region × product × month OLAP cube
+
+"""
+The challenge-style questions ("Product B revenue", "East share of
+Product A", "revenue > 1000 in East or West", "best product per region")
+all boil down to SUM/COUNT over a few dimensions. We precompute them once:
+
+    SELECT region, product, month, revenue_band,
+           SUM(revenue), COUNT(*), MIN(revenue), MAX(revenue)
+    FROM sales
+    GROUP BY region, product, month, revenue_band
+
+and answer every slice (fix one dimension), dice (fix several / IN lists)
+and rollup (GROUP BY fewer dimensions) from that small table. Query time
+depends on the number of cube cells, never on the number of sales.
+
+Revenue bands are half-open ranges (low, high]. A revenue filter like
+"revenue > 1000" is exact only when 1000 is one of the band edges - the
+default edges include the thresholds used in challenges.py.
+
+A saved cube remembers its CSV's size and mtime (like the columnar cache);
+query and rollup rebuild it when the CSV has changed since.
+
+    python sales_cube.py build sales_data.csv
+    python sales_cube.py query --product B
+    python sales_cube.py query --region East --region West --min-revenue 1000
+    python sales_cube.py rollup --by region --by product
+"""
+
+import argparse
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from sales_cache import _source_stat, load_sales_chunks
+from sales_io import CHUNKSIZE, SALES_FILE
+
+CUBE_FILE = 'sales_cube.pkl'
+CUBE_VERSION = 2
+
+DIMENSIONS = ['region', 'product', 'month', 'band']
+
+# Band i holds BAND_EDGES[i] < revenue <= BAND_EDGES[i + 1]
+BAND_EDGES = [-np.inf, 0, 100, 250, 500, 750, 1000, 1200, 1500, 2000, 2500, 5000, 10000, np.inf]
+
+MEASURES = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def _band_of(revenue, edges):
+    return np.searchsorted(edges, revenue.to_numpy(), side='left') - 1
+
+
+class SalesCube:
+    """SUM/COUNT/MIN/MAX of revenue by region, product, month and revenue band."""
+
+    def __init__(self, cells, edges=BAND_EDGES, source=None):
+        self.cells = cells
+        self.edges = list(edges)
+        # The CSV it was built from: {'path', 'size', 'mtime_ns'} (None if not from_csv)
+        self.source = source
+
+    # ----------------------------------------
+    # Building
+    # ----------------------------------------
+    @classmethod
+    def from_frame(cls, df, edges=BAND_EDGES):
+        dates = pd.to_datetime(df['date'])
+        keys = df.assign(
+            month=dates.dt.to_period('M'),
+            band=_band_of(df['revenue'], np.asarray(edges, dtype=float)),
+        )
+        cells = keys.groupby(DIMENSIONS, observed=True)['revenue'].agg(['sum', 'count', 'min', 'max'])
+        if pd.api.types.is_integer_dtype(cells['min']):
+            cells = cells.astype({'min': 'int64', 'max': 'int64'})
+        return cls(cells, edges)
+
+    @classmethod
+    def from_csv(cls, path=SALES_FILE, chunksize=CHUNKSIZE, edges=BAND_EDGES):
+        """Build chunk by chunk - memory depends on the number of cells, not rows."""
+        # Stat before reading, so a write during the build makes the cube stale
+        source = _source_stat(path)
+        cube = None
+        for chunk in load_sales_chunks(path, chunksize):
+            partial = cls.from_frame(chunk, edges)
+            cube = partial if cube is None else cube.merge(partial)
+        if cube is None:
+            raise ValueError(f"no sales rows in {path}")
+        cube.source = {'path': os.path.abspath(path), **source}
+        return cube
+
+    def merge(self, other):
+        if self.edges != other.edges:
+            raise ValueError("cannot merge cubes with different revenue bands")
+        cells = pd.concat([self.cells, other.cells]).groupby(level=DIMENSIONS, observed=True).agg(MEASURES)
+        return SalesCube(cells, self.edges)
+
+    # ----------------------------------------
+    # Saving / loading
+    # ----------------------------------------
+    def save(self, path=CUBE_FILE):
+        with open(path, 'wb') as f:
+            pickle.dump({'version': CUBE_VERSION, 'edges': self.edges, 'cells': self.cells,
+                         'source': self.source}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path=CUBE_FILE):
+        with open(path, 'rb') as f:
+            saved = pickle.load(f)
+        if saved.get('version') != CUBE_VERSION:
+            raise ValueError(f"{path} was written by an incompatible version - rebuild the cube")
+        return cls(saved['cells'], saved['edges'], saved['source'])
+
+    def is_current(self):
+        """True if the source CSV still has the size and mtime the cube was built from."""
+        if self.source is None:
+            return False
+        path = self.source['path']
+        return os.path.exists(path) and {'path': path, **_source_stat(path)} == self.source
+
+    # ----------------------------------------
+    # Slice / dice
+    # ----------------------------------------
+    def _band_mask(self, min_revenue, max_revenue):
+        """Bands fully inside min_revenue < revenue <= max_revenue."""
+        low = np.asarray(self.edges[:-1], dtype=float)
+        high = np.asarray(self.edges[1:], dtype=float)
+        keep = np.ones(len(low), dtype=bool)
+        for bound, name in ((min_revenue, 'min_revenue'), (max_revenue, 'max_revenue')):
+            if bound is not None and bound not in self.edges:
+                raise ValueError(f"{name}={bound} is not a band edge; exact edges are {self.edges[1:-1]}")
+        if min_revenue is not None:
+            keep &= low >= min_revenue
+        if max_revenue is not None:
+            keep &= high <= max_revenue
+        return np.flatnonzero(keep)
+
+    def select(self, region=None, product=None, month=None, min_revenue=None, max_revenue=None):
+        """Cube cells matching the filters. Each filter is a value or a list (IN).
+
+        min_revenue is exclusive (revenue > x) and max_revenue inclusive
+        (revenue <= x), matching the (low, high] bands.
+        """
+        index = self.cells.index
+        mask = np.ones(len(index), dtype=bool)
+        for level, wanted in (('region', region), ('product', product), ('month', month)):
+            if wanted is None:
+                continue
+            if not isinstance(wanted, (list, tuple, set)):
+                wanted = [wanted]
+            if level == 'month':
+                wanted = [pd.Period(m, freq='M') for m in wanted]
+            mask &= index.get_level_values(level).isin(list(wanted))
+        if min_revenue is not None or max_revenue is not None:
+            mask &= index.get_level_values('band').isin(self._band_mask(min_revenue, max_revenue))
+        return self.cells[mask]
+
+    def total(self, measure='sum', **filters):
+        """One number: e.g. total(product='B') or total('count', region='West')."""
+        cells = self.select(**filters)[measure]
+        if cells.empty:
+            return 0 if measure in ('sum', 'count') else None
+        return getattr(cells, MEASURES[measure])()
+
+    # ----------------------------------------
+    # Rollup
+    # ----------------------------------------
+    def rollup(self, by, **filters):
+        """GROUP BY some of region/product/month/band, with sum, count, min, max, mean."""
+        by = [by] if isinstance(by, str) else list(by)
+        result = self.select(**filters).groupby(level=by, observed=True).agg(MEASURES)
+        result['mean'] = result['sum'] / result['count']
+        return result
+
+    def pivot(self, rows='region', columns='product', measure='sum', **filters):
+        """Two-dimensional rollup, zeros where there are no sales."""
+        return self.rollup([rows, columns], **filters)[measure].unstack(columns, fill_value=0)
+
+    def share(self, region, product, **filters):
+        """% of `product`'s revenue that was sold in `region`."""
+        product_total = self.total(product=product, **filters)
+        if not product_total:
+            return 0.0
+        return self.total(region=region, product=product, **filters) / product_total * 100
+
+    def best_product_per_region(self, **filters):
+        """DataFrame: region -> best product and its revenue."""
+        pivot = self.pivot(**filters)
+        return pd.DataFrame({'product': pivot.idxmax(axis=1), 'revenue': pivot.max(axis=1)})
+
+
+# ============================================
+# COMMAND LINE
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the sales OLAP cube")
+    parser.add_argument('--cube', default=CUBE_FILE, help="cube file to write / read")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="precompute the cube from a sales CSV")
+    build.add_argument('input', nargs='?', default=SALES_FILE)
+    build.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+
+    for name in ('query', 'rollup'):
+        sub = commands.add_parser(name)
+        sub.add_argument('--region', action='append')
+        sub.add_argument('--product', action='append')
+        sub.add_argument('--month', action='append', help="YYYY-MM")
+        sub.add_argument('--min-revenue', type=float, help="revenue > this (must be a band edge)")
+        sub.add_argument('--max-revenue', type=float, help="revenue <= this (must be a band edge)")
+        if name == 'query':
+            sub.add_argument('--measure', choices=list(MEASURES), default='sum')
+        else:
+            sub.add_argument('--by', action='append', choices=DIMENSIONS, required=True)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        cube = SalesCube.from_csv(args.input, args.chunksize)
+        cube.save(args.cube)
+        print(f"✅ Cube with {len(cube.cells):,} cells saved to {args.cube}")
+        return
+
+    cube = SalesCube.load(args.cube)
+    # Cubes saved from a frame (source None) have nothing to check against
+    if cube.source is not None and not cube.is_current():
+        source = cube.source['path']
+        if not os.path.exists(source):
+            parser.error(f"{source}, the source of {args.cube}, is gone - rebuild the cube")
+        print(f"🔄 {source} changed since {args.cube} was built - rebuilding")
+        cube = SalesCube.from_csv(source, edges=cube.edges)
+        cube.save(args.cube)
+    filters = dict(region=args.region, product=args.product, month=args.month,
+                   min_revenue=args.min_revenue, max_revenue=args.max_revenue)
+    if args.command == 'query':
+        print(cube.total(args.measure, **filters))
+    else:
+        print(cube.rollup(args.by, **filters))
+
+
+if __name__ == '__main__':
+    main()
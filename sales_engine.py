@@ -0,0 +1,367 @@
+# Single-pass aggregation engine for the sales dashboard
+
+"""
+Every number on the executive dashboard can be rebuilt from ONE group-by:
+
+    SELECT region, product, month,
+           SUM(revenue), COUNT(*), MIN(revenue), MAX(revenue),
+           MIN(date), MAX(date)
+    FROM sales
+    GROUP BY region, product, month
+
+We scan the raw rows once to build that small table (the "cells") and then
+derive totals, region/product/month stats, the region × product pivot,
+min/max, the quarter-over-quarter growth and market share from it. A second,
+still small table keeps daily revenue per region and product for the
+time-series engine (sales_timeseries.py), and mergeable sketches of the
+sale values give medians, percentiles and revenue-band histograms
+(sales_sketch.py). The only other pass
+over the rows is a top-N pick (partial selection, see sales_topn.py) for
+the concentration metric.
+
+The cells are MERGEABLE: two aggregates over different slices of the data
+combine into the aggregate of the whole (sums and counts add, mins and
+maxes take the min/max). That lets us stream a file chunk by chunk and keep
+memory proportional to the number of distinct keys, not the row count.
+"""
+
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from sales_cache import load_sales_chunks
+from sales_forecast import forecast_table
+from sales_io import CHUNKSIZE
+from sales_sketch import SaleSketches
+from sales_sparse import SparsePivot
+from sales_timeseries import SalesTimeSeries
+from sales_topn import nlargest, rank
+
+# How many of the largest sales we remember (Top 2 concentration, top-N lists)
+TOP_K = 10
+
+# How many of the earliest sales the streaming mode keeps for the timeline
+TIMELINE_K = 1000
+
+CELL_KEYS = ['region', 'product', 'month']
+DAILY_KEYS = ['region', 'product', 'date']
+
+# How each cell column combines when two aggregates are merged
+CELL_MERGE = {
+    'sum': 'sum',
+    'count': 'sum',
+    'min': 'min',
+    'max': 'max',
+    'first_date': 'min',
+    'last_date': 'max',
+    'first_row': 'min',
+}
+
+ROW_COLUMNS = ['date', 'product', 'region', 'revenue', 'row']
+
+
+class SalesAggregate:
+    """Shared result of one aggregation pass over the sales rows."""
+
+    def __init__(self, cells, total_transactions, rows=None, top_sales=None, timeline=None,
+                 top_k=TOP_K, timeline_k=None, daily=None, sketches=None):
+        # cells: one row per (region, product, month) with
+        #   sum, count, min, max, first_date, last_date, first_row
+        self.cells = cells
+        # daily: revenue per (region, product, date)
+        self.daily = daily
+        # sketches: sale-value quantiles / histograms / distinct days (SaleSketches)
+        self.sketches = sketches
+        self.total_transactions = int(total_transactions)
+        self.top_k = top_k
+        self.timeline_k = timeline_k
+        # rows: the sales this aggregate was built from (date, product, region,
+        # revenue, row). top_sales / timeline are picked from them on first use,
+        # unless they are handed in ready-made (merged or unpickled aggregates).
+        self._rows = rows
+        if top_sales is not None:
+            self.top_sales = top_sales
+        if timeline is not None:
+            self.timeline = timeline
+
+    @classmethod
+    def from_rollups(cls, total_transactions, rollups, sketches, top_sales, timeline, top_k=TOP_K,
+                     timeline_k=None):
+        """Aggregate that holds finished rollups only - no cells or daily table.
+
+        `rollups` hands in the derived views ready-made: total_revenue,
+        earliest/latest_date, highest/lowest_sale, region/product_stats,
+        regions/products_in_order, sparse_pivot, month_totals and forecast.
+        The out-of-core path (sales_spill.py) builds them one hash partition
+        at a time, so the whole cell table is never in memory. Such an
+        aggregate can't be merged or pickled.
+        """
+        agg = cls(None, total_transactions, top_sales=top_sales, timeline=timeline, top_k=top_k,
+                  timeline_k=timeline_k, sketches=sketches)
+        for name, value in rollups.items():
+            setattr(agg, name, value)
+        return agg
+
+    # ----------------------------------------
+    # Merging partial aggregates
+    # ----------------------------------------
+    def merge(self, other):
+        """Combine with an aggregate of the rows that come AFTER this one's."""
+        # Row numbers in `other` start at 0 - shift them past our rows
+        offset = self.total_transactions
+        other_cells = other.cells.assign(first_row=other.cells['first_row'] + offset)
+        cells = (
+            pd.concat([self.cells, other_cells])
+            .groupby(level=CELL_KEYS, observed=True)
+            .agg(CELL_MERGE)
+        )
+        daily = pd.concat([self.daily, other.daily]).groupby(level=DAILY_KEYS, observed=True).sum()
+
+        top_sales = _keep_largest(
+            pd.concat([self.top_sales, _shift_rows(other.top_sales, offset)]), self.top_k
+        )
+        timeline = _keep_earliest(
+            pd.concat([self.timeline, _shift_rows(other.timeline, offset)]), self.timeline_k
+        )
+
+        return SalesAggregate(
+            cells, self.total_transactions + other.total_transactions,
+            top_sales=top_sales, timeline=timeline,
+            top_k=self.top_k, timeline_k=self.timeline_k, daily=daily,
+            sketches=self.sketches.merge(other.sketches),
+        )
+
+    def __getstate__(self):
+        # Pickle (state files, worker processes) only the raw aggregate - no
+        # source rows, and none of the cached views, which are cheap to rebuild
+        return {
+            'cells': self.cells,
+            'daily': self.daily,
+            'sketches': self.sketches,
+            'total_transactions': self.total_transactions,
+            'top_k': self.top_k,
+            'timeline_k': self.timeline_k,
+            '_rows': None,
+            'top_sales': self.top_sales,
+            'timeline': self.timeline,
+        }
+
+    # ----------------------------------------
+    # Row-level picks (top-N sales, timeline)
+    # ----------------------------------------
+    @cached_property
+    def top_sales(self):
+        # The top_k largest sales, highest first
+        return nlargest(self._rows, self.top_k, 'revenue')
+
+    @cached_property
+    def timeline(self):
+        # Sales in date order - all of them, or the earliest timeline_k
+        return _keep_earliest(self._rows, self.timeline_k)
+
+    @property
+    def timeline_truncated(self):
+        return len(self.timeline) < self.total_transactions
+
+    # ----------------------------------------
+    # Executive summary
+    # ----------------------------------------
+    @cached_property
+    def total_revenue(self):
+        return self.cells['sum'].sum()
+
+    @cached_property
+    def average_sale(self):
+        return self.total_revenue / self.total_transactions
+
+    @cached_property
+    def earliest_date(self):
+        return self.cells['first_date'].min()
+
+    @cached_property
+    def latest_date(self):
+        return self.cells['last_date'].max()
+
+    @cached_property
+    def highest_sale(self):
+        return self.cells['max'].max()
+
+    @cached_property
+    def lowest_sale(self):
+        return self.cells['min'].min()
+
+    # ----------------------------------------
+    # Region / product stats (GROUP BY rollups of the cells)
+    # ----------------------------------------
+    def _rollup(self, level):
+        stats = self.cells.groupby(level=level, observed=True)[['sum', 'count']].sum()
+        stats['mean'] = stats['sum'] / stats['count']
+        return stats
+
+    @cached_property
+    def region_stats(self):
+        return self._rollup('region')
+
+    @cached_property
+    def product_stats(self):
+        return self._rollup('product')
+
+    def _first_seen(self, level):
+        # Keys in the order they first appear in the data (like df[col].unique())
+        first_row = self.cells.groupby(level=level, observed=True)['first_row'].min()
+        return list(first_row.sort_values(kind='stable').index)
+
+    @cached_property
+    def regions_in_order(self):
+        return self._first_seen('region')
+
+    @cached_property
+    def products_in_order(self):
+        return self._first_seen('product')
+
+    # ----------------------------------------
+    # Region × product pivot
+    # ----------------------------------------
+    @cached_property
+    def sparse_pivot(self):
+        # Only the combinations that sold - see sales_sparse.py
+        region_product = self.cells['sum'].groupby(level=['region', 'product'], observed=True).sum()
+        return SparsePivot.from_series(region_product)
+
+    @cached_property
+    def revenue_pivot(self):
+        # Dense view, for display and the market-share table
+        return self.sparse_pivot.to_dense()
+
+    @cached_property
+    def zero_sales(self):
+        # (region, product) pairs with no revenue, row by row
+        return self.sparse_pivot.zero_cells()
+
+    @cached_property
+    def best_product_by_region(self):
+        return self.sparse_pivot.row_max()
+
+    # ----------------------------------------
+    # Time-based metrics
+    # ----------------------------------------
+    @cached_property
+    def month_totals(self):
+        # Revenue per calendar month (Period[M]), in time order
+        return self.cells['sum'].groupby(level='month').sum()
+
+    @cached_property
+    def monthly_revenue(self):
+        # Revenue by month, highest first. Labelled 'March' - or 'March 2024'
+        # when the data spans several years, so Marches never merge.
+        months = self.month_totals.index
+        label = '%B' if months.year.nunique() == 1 else '%B %Y'
+        by_name = pd.Series(self.month_totals.to_numpy(), index=months.strftime(label), name='sum')
+        return rank(by_name.rename_axis('month_name'))
+
+    @cached_property
+    def month_count(self):
+        return len(self.month_totals)
+
+    @cached_property
+    def quarter_totals(self):
+        # Revenue per calendar quarter (Period[Q]), in time order
+        months = self.month_totals
+        return months.groupby(months.index.asfreq('Q')).sum()
+
+    @cached_property
+    def forecast(self):
+        # Next month's revenue per region × product (sales_forecast.py)
+        monthly = SalesTimeSeries.from_aggregate(self).resample('monthly', by=['region', 'product'])
+        return forecast_table(monthly, through=self.latest_date)
+
+    # ----------------------------------------
+    # Top-N
+    # ----------------------------------------
+    def top_sales_total(self, n):
+        return self.top_sales['revenue'].head(n).sum()
+
+
+def _shift_rows(rows, offset):
+    return rows.assign(row=rows['row'] + offset)
+
+
+def _keep_largest(rows, k):
+    # Highest revenue first; ties keep the earlier row. Callers concatenate
+    # in row order, so position order is row order.
+    return nlargest(rows, k, 'revenue')
+
+
+def _keep_earliest(rows, k):
+    # Date order; same-day sales keep file order. k=None keeps everything.
+    rows = rows.sort_values(['date', 'row'], kind='stable')
+    return rows if k is None else rows.head(k)
+
+
+def build_aggregate(df, top_k=TOP_K, timeline_k=None):
+    """Aggregate a sales DataFrame (date, product, region, revenue) in one pass.
+
+    timeline_k=None keeps every sale for the timeline; a number keeps only
+    the earliest ones (used when streaming so memory stays bounded).
+    """
+    rows, cells, daily = group_rows(df, np.arange(len(df)))
+    sketches = SaleSketches.from_rows(rows['region'], rows['product'], rows['revenue'], daily)
+
+    return SalesAggregate(cells, len(df), rows=rows[ROW_COLUMNS], top_k=top_k, timeline_k=timeline_k,
+                          daily=daily, sketches=sketches)
+
+
+def group_rows(df, row, by=()):
+    """The group-bys behind an aggregate: (rows, cells, daily).
+
+    `row` numbers the sales (first-seen order). `by` adds leading group
+    keys, e.g. a store column, so one group-by covers many aggregates.
+    """
+    by = list(by)
+    dates = pd.to_datetime(df['date'])
+    rows = df.assign(
+        date=dates,
+        month=dates.dt.to_period('M'),
+        row=row,
+    )
+
+    # Whole days, in case the dates carry a time of day
+    days = dates.dt.normalize()
+    daily = rows['revenue'].groupby([rows[col] for col in by + ['region', 'product']] + [days], observed=True).sum()
+    if pd.api.types.is_integer_dtype(daily):
+        daily = daily.astype('int64')
+
+    cells = rows.groupby(by + CELL_KEYS, observed=True).agg(
+        sum=('revenue', 'sum'),
+        count=('revenue', 'count'),
+        min=('revenue', 'min'),
+        max=('revenue', 'max'),
+        first_date=('date', 'min'),
+        last_date=('date', 'max'),
+        first_row=('row', 'min'),
+    )
+    # Revenue may be loaded as int8/int16 - widen the (tiny) cell table so
+    # merged min/max and "high minus low" can never overflow
+    if pd.api.types.is_integer_dtype(cells['min']):
+        cells = cells.astype({'min': 'int64', 'max': 'int64'})
+    return rows, cells, daily
+
+
+def aggregate_chunks(chunks, top_k=TOP_K, timeline_k=TIMELINE_K):
+    """Fold an iterable of DataFrame chunks into one aggregate."""
+    agg = None
+    for chunk in chunks:
+        partial = build_aggregate(chunk, top_k=top_k, timeline_k=timeline_k)
+        agg = partial if agg is None else agg.merge(partial)
+
+    if agg is None:
+        raise ValueError("no sales rows to aggregate")
+    return agg
+
+
+def aggregate_csv(path, chunksize=CHUNKSIZE, top_k=TOP_K, timeline_k=TIMELINE_K,
+                  use_cache=True, verify_cache=False, reader='pandas'):
+    """Stream a sales CSV in fixed-size chunks (memory ~ distinct keys, not rows)."""
+    chunks = load_sales_chunks(path, chunksize, use_cache=use_cache, verify=verify_cache, reader=reader)
+    return aggregate_chunks(chunks, top_k=top_k, timeline_k=timeline_k)
@@ -0,0 +1,130 @@
+# Writing export files: buffered, atomic and in parallel
+
+"""
+Each export is rendered to bytes first, then written with ONE write call
+into a temp file in the target folder and renamed over the old file
+(os.replace is atomic on the same filesystem). A reader opening
+sales_metrics.csv mid-run sees either the previous report or the new one,
+never half of a file.
+
+The writes are I/O bound - on networked storage most of the time is spent
+waiting on the server - so all files go out at once on a small thread pool.
+
+export_files() also skips outputs whose content has not changed. Each
+rendered file is fingerprinted (sha256). If the file on disk already has
+that content it is left alone - same bytes, same mtime, so nothing
+downstream re-syncs. export_manifest.json records every output's hash and
+whether this run regenerated it.
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sales_cache import file_sha256
+
+MANIFEST_FILE = 'export_manifest.json'
+
+
+def atomic_write(path, data):
+    """Write bytes to `path` via a temp file + rename; returns the path."""
+    folder, name = os.path.split(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    # open(..., 'xb') rather than mkstemp so the file gets the usual
+    # umask permissions (mkstemp would make it owner-only)
+    tmp = os.path.join(folder, f'.{name}.{uuid.uuid4().hex}.tmp')
+    try:
+        with open(tmp, 'xb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+def write_files(files, workers=None):
+    """Write {path: bytes} concurrently; returns the paths in the given order.
+
+    Every write is attempted; the first failure is raised once all are done.
+    """
+    if not files:
+        return []
+    workers = workers or len(files)
+    with ThreadPoolExecutor(max_workers=min(workers, len(files))) as pool:
+        futures = [pool.submit(atomic_write, path, data) for path, data in files.items()]
+    # Leaving the with-block waited for every write
+    return [future.result() for future in futures]
+
+
+# ============================================
+# SKIP-IF-UNCHANGED
+# ============================================
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_manifest(folder):
+    try:
+        with open(os.path.join(folder, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _is_current(path, digest, size, recorded):
+    """True if the file at `path` already holds exactly these bytes."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    if stat.st_size != size:
+        return False
+    # Untouched since we wrote it with this fingerprint - no need to read it back
+    if recorded and recorded.get('sha256') == digest and recorded.get('mtime_ns') == stat.st_mtime_ns:
+        return True
+    return file_sha256(path) == digest
+
+
+def export_files(folder, rendered, force=False, workers=None):
+    """Write {file name: bytes} into `folder`, skipping files whose content is unchanged.
+
+    Returns {path: 'written' | 'unchanged'} in the given order and rewrites
+    the manifest. force=True writes everything.
+    """
+    previous = read_manifest(folder).get('files', {})
+    digests = {name: fingerprint(data) for name, data in rendered.items()}
+    status = {}
+    changed = {}
+    for name, data in rendered.items():
+        path = os.path.join(folder, name)
+        if not force and _is_current(path, digests[name], len(data), previous.get(name)):
+            status[path] = 'unchanged'
+        else:
+            status[path] = 'written'
+            changed[path] = data
+    write_files(changed, workers)
+
+    files = {}
+    for name, data in rendered.items():
+        path = os.path.join(folder, name)
+        files[name] = {
+            'sha256': digests[name],
+            'size': len(data),
+            'mtime_ns': os.stat(path).st_mtime_ns,
+            'regenerated': status[path] == 'written',
+        }
+    manifest = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'regenerated': [name for name in rendered if files[name]['regenerated']],
+        'unchanged': [name for name in rendered if not files[name]['regenerated']],
+        'files': files,
+    }
+    atomic_write(os.path.join(folder, MANIFEST_FILE), (json.dumps(manifest, indent=2) + '\n').encode('utf-8'))
+    return status
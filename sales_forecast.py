@@ -0,0 +1,96 @@
+# Batched revenue forecasts for every region × product series
+
+"""
+Three simple models, fitted to the monthly revenue of every region ×
+product combination at once. Each series is a row of one 2-D array
+(series × months), so each model is a few whole-array NumPy operations
+no matter how many combinations there are:
+
+    moving_average   mean of the last `window` months
+    exp_smoothing    simple exponential smoothing. The final level is a
+                     weighted sum of the history, so the whole fit is
+                     one matrix-vector product:
+                         level = history @ [(1-a)^(T-1), a(1-a)^(T-2), ..., a(1-a), a]
+    linear_trend     least-squares line through the months, extended
+                     `horizon` months ahead (floored at $0)
+
+Moving average and smoothing forecast a flat level; the trend line
+forecasts one value per future month.
+
+A last month that is still in progress (data stops before its end) would
+drag every model down, so it is left out of the fit and becomes the first
+forecast month instead.
+"""
+
+import numpy as np
+import pandas as pd
+
+MA_WINDOW = 3
+SES_ALPHA = 0.5
+
+MODELS = ['moving_average', 'exp_smoothing', 'linear_trend']
+
+
+def moving_average(history, window=MA_WINDOW):
+    """Mean of the last `window` columns of each row."""
+    return history[:, -window:].mean(axis=1)
+
+
+def exp_smoothing(history, alpha=SES_ALPHA):
+    """Final smoothed level of each row (level starts at the first value)."""
+    months = history.shape[1]
+    weights = alpha * (1 - alpha) ** np.arange(months - 1, -1, -1, dtype='float64')
+    weights[0] = (1 - alpha) ** (months - 1)
+    return history @ weights
+
+
+def linear_trend(history, horizon=1):
+    """Least-squares line per row, evaluated at the next `horizon` months."""
+    months = history.shape[1]
+    t = np.arange(months, dtype='float64')
+    t_centered = t - t.mean()
+    spread = t_centered @ t_centered
+    slope = history @ t_centered / spread if spread else np.zeros(len(history))
+    intercept = history.mean(axis=1) - slope * t.mean()
+    future = np.arange(months, months + horizon, dtype='float64')
+    return np.maximum(intercept[:, None] + slope[:, None] * future, 0)
+
+
+def forecast(history, horizon=1, window=MA_WINDOW, alpha=SES_ALPHA):
+    """{model: (series × horizon) array} for a (series × months) history."""
+    history = np.asarray(history, dtype='float64')
+    flat = np.ones((1, horizon))
+    return {
+        'moving_average': moving_average(history, window)[:, None] * flat,
+        'exp_smoothing': exp_smoothing(history, alpha)[:, None] * flat,
+        'linear_trend': linear_trend(history, horizon),
+    }
+
+
+def is_partial(month, through):
+    """True if data that stops at date `through` ends before the end of `month` (a Period)."""
+    return pd.Timestamp(through).normalize() < month.end_time.normalize()
+
+
+def forecast_table(monthly, horizon=1, window=MA_WINDOW, alpha=SES_ALPHA, through=None):
+    """Forecasts as a long table: region, product, month + one column per model.
+
+    `monthly` is revenue with one row per month (gap-free PeriodIndex) and
+    one column per (region, product) - SalesTimeSeries.resample('monthly',
+    by=['region', 'product']). `through` is the last date with data; if the
+    last month is partial it is dropped from the fit and forecast instead.
+    """
+    if through is not None and len(monthly) > 1 and is_partial(monthly.index[-1], through):
+        monthly = monthly.iloc[:-1]
+    fitted = forecast(monthly.to_numpy().T, horizon, window, alpha)
+    months = pd.period_range(monthly.index[-1] + 1, periods=horizon, freq=monthly.index.freq)
+    series = monthly.columns
+
+    table = pd.DataFrame({
+        'region': np.repeat(series.get_level_values('region').astype(str), horizon),
+        'product': np.repeat(series.get_level_values('product').astype(str), horizon),
+        'month': np.tile(months.astype(str), len(series)),
+    })
+    for model in MODELS:
+        table[model] = fitted[model].ravel().round(2)
+    return table
@@ -0,0 +1,50 @@
+# Vectorized text formatting for the dashboard
+
+"""
+Instead of one f-string + print() per row, each dashboard list is built as
+a whole column of strings with pandas string concatenation and joined
+into the section's text in one go.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def money(values, decimals=0):
+    """'1,234' / '1,234.56' strings for a Series of numbers (no $ sign)."""
+    return values.map(f'{{:,.{decimals}f}}'.format)
+
+
+def percent(values):
+    """'40.3' strings for a Series of percentages (no % sign)."""
+    return values.map('{:.1f}'.format)
+
+
+def text(values):
+    """Any Series or Index (categorical, numbers...) as plain strings."""
+    index = values if isinstance(values, pd.Index) else values.index
+    # map(str), not astype(str): under pandas 3 astype keeps NaN missing instead of 'nan'
+    return pd.Series(np.asarray(values, dtype=object), index=index).map(str)
+
+
+def ranks(values):
+    """'1', '2', ... aligned with a Series."""
+    return pd.Series(np.arange(1, len(values) + 1), index=values.index).astype(str)
+
+
+def page(rows, limit=None, page_number=1):
+    """Rows of page `page_number` (1-based) with `limit` rows per page; all rows if limit is None."""
+    if limit is None:
+        return rows
+    start = (page_number - 1) * limit
+    return rows.iloc[start:start + limit]
+
+
+def timeline_lines(rows):
+    """'  Jan 31: Product A (East) - $1,200' for each sale."""
+    return (
+        '  ' + rows['date'].dt.strftime('%b %d')
+        + ': Product ' + text(rows['product'])
+        + ' (' + text(rows['region']) + ') - $'
+        + money(rows['revenue'])
+    )
@@ -0,0 +1,176 @@
+# Secondary indexes for WHERE-style filters
+
+"""
+Every `df[df['region'] == 'West']` compares the whole region column again.
+An index does that work once:
+
+    region / product   the row ids of each value, stored back to back
+                       (sorted by value, then by row) with an offsets array
+                       - "WHERE region = 'West'" is one slice
+    revenue            row ids ordered by revenue - "WHERE revenue > 1000"
+                       is a binary search plus one slice
+
+Filters return sorted row-id arrays. AND walks the shortest list and
+probes a bitmap of the others; OR/IN merges lists through a bitmap:
+
+    index = load_index('sales_data.csv', df)
+    rows = index.intersect(index.isin('region', ['East', 'West']),
+                           index.greater_than(1000))
+    df.iloc[rows]
+
+The index is saved to .sales_cache/<file name>.index.npz and rebuilt when
+the source file's size or mtime changes.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from sales_cache import CACHE_DIR, _source_stat
+
+INDEX_VERSION = 2
+INDEXED_COLUMNS = ['region', 'product']
+
+
+def index_path_for(path):
+    folder, name = os.path.split(os.path.abspath(path))
+    return os.path.join(folder, CACHE_DIR, f'{name}.index.npz')
+
+
+class SalesIndex:
+    """Sorted row-id lists per region/product value and a revenue-ordered row list."""
+
+    def __init__(self, rows, postings, revenue_rows, revenue_sorted):
+        self.rows = rows
+        # column -> (values, offsets, row_ids)
+        self.postings = postings
+        self.revenue_rows = revenue_rows
+        self.revenue_sorted = revenue_sorted
+
+    @classmethod
+    def from_frame(cls, df):
+        postings = {}
+        for col in INDEXED_COLUMNS:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                codes, values = df[col].cat.codes.to_numpy(), np.asarray(df[col].cat.categories, dtype=str)
+                # Categories may be in first-seen order; eq() binary-searches the
+                # values, so renumber the codes in sorted-value order
+                order = np.argsort(values, kind='stable')
+                renumber = np.empty(len(order), dtype=np.intp)
+                renumber[order] = np.arange(len(order))
+                codes, values = np.where(codes >= 0, renumber[codes], -1), values[order]
+            else:
+                codes, values = pd.factorize(df[col], sort=True)
+            # A stable sort keeps each value's rows in file order
+            row_ids = np.argsort(codes, kind='stable')
+            counts = np.bincount(codes[codes >= 0], minlength=len(values))
+            skip = np.count_nonzero(codes < 0)
+            offsets = np.concatenate([[0], np.cumsum(counts)]) + skip
+            postings[col] = (np.asarray(values, dtype=str), offsets, row_ids)
+
+        revenue = df['revenue'].to_numpy()
+        revenue_rows = np.argsort(revenue, kind='stable')
+        return cls(len(df), postings, revenue_rows, revenue[revenue_rows])
+
+    # ----------------------------------------
+    # Filters - each returns sorted row ids
+    # ----------------------------------------
+    def eq(self, column, value):
+        """WHERE column = value"""
+        values, offsets, row_ids = self.postings[column]
+        position = np.searchsorted(values, value)
+        if position == len(values) or values[position] != value:
+            return np.empty(0, dtype=row_ids.dtype)
+        return row_ids[offsets[position]:offsets[position + 1]]
+
+    def isin(self, column, values):
+        """WHERE column IN (values)"""
+        return self.union(*(self.eq(column, value) for value in values))
+
+    def between(self, low=None, high=None, include_low=True, include_high=True):
+        """WHERE revenue BETWEEN low AND high (either end may be open)."""
+        start = 0 if low is None else np.searchsorted(self.revenue_sorted, low,
+                                                      side='left' if include_low else 'right')
+        stop = self.rows if high is None else np.searchsorted(self.revenue_sorted, high,
+                                                              side='right' if include_high else 'left')
+        # Back to row order through a bitmap - cheaper than sorting a wide range
+        return np.flatnonzero(self._bitmap(self.revenue_rows[start:max(start, stop)]))
+
+    def greater_than(self, value):
+        """WHERE revenue > value"""
+        return self.between(low=value, include_low=False)
+
+    def intersect(self, *filters):
+        """AND of several filters."""
+        # Walk the shortest list, probing a bitmap of each of the others
+        filters = sorted(filters, key=len)
+        result = filters[0]
+        for other in filters[1:]:
+            result = result[self._bitmap(other)[result]]
+        return result
+
+    def union(self, *filters):
+        """OR of several filters."""
+        bitmap = np.zeros(self.rows, dtype=bool)
+        for row_ids in filters:
+            bitmap[row_ids] = True
+        return np.flatnonzero(bitmap)
+
+    def _bitmap(self, row_ids):
+        bitmap = np.zeros(self.rows, dtype=bool)
+        bitmap[row_ids] = True
+        return bitmap
+
+    # ----------------------------------------
+    # Saving / loading
+    # ----------------------------------------
+    def save(self, path, source=None):
+        arrays = {'revenue_rows': self.revenue_rows, 'revenue_sorted': self.revenue_sorted}
+        for col, (values, offsets, row_ids) in self.postings.items():
+            arrays[f'{col}_values'] = values
+            arrays[f'{col}_offsets'] = offsets
+            arrays[f'{col}_rows'] = row_ids
+        meta = {'version': INDEX_VERSION, 'rows': self.rows, 'source': source}
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            meta = json.loads(str(saved['meta']))
+            postings = {
+                col: (saved[f'{col}_values'], saved[f'{col}_offsets'], saved[f'{col}_rows'])
+                for col in INDEXED_COLUMNS
+            }
+            index = cls(meta['rows'], postings, saved['revenue_rows'], saved['revenue_sorted'])
+        index.meta = meta
+        return index
+
+
+def load_index(path, df=None):
+    """Index for the sales file at `path`, from disk if still valid, else built and saved.
+
+    `df` is the already-loaded file (saves reading it again when rebuilding).
+    """
+    target = index_path_for(path)
+    source = _source_stat(path)
+    try:
+        index = SalesIndex.load(target)
+        if (index.meta['version'] == INDEX_VERSION and index.meta['source'] == source
+                and (df is None or index.rows == len(df))):
+            return index
+    except (OSError, KeyError, ValueError):
+        pass
+
+    if df is None:
+        from sales_io import read_sales
+        df = read_sales(path)
+    index = SalesIndex.from_frame(df)
+    index.save(target, source)
+    return index
@@ -0,0 +1,176 @@
+# Loading sales_data.csv - whole file or chunk by chunk
+
+"""
+Declared schema for sales_data.csv (date,product,region,revenue):
+
+    date      datetime64[ns]   parsed once, at load time
+    product   category         a few distinct values -> small integer codes
+    region    category
+    revenue   smallest signed integer that holds every value (int8..int64)
+
+Month fields are derived from `date` as integer period codes inside the
+aggregation engine - there are no month / month_name / month_num string
+columns any more.
+
+Inputs may be compressed (sales.csv.gz, .csv.zst, .csv.bz2, .csv.xz). The
+codec is picked from the file name and the text is decompressed as it is
+parsed, so the uncompressed CSV never has to exist on disk or in memory.
+
+Two parsers produce the same typed frame:
+
+    pandas    pandas' C parser (the default)
+    pyarrow   pyarrow.csv - multi-threaded, converts straight to typed
+              Arrow columns (dictionary-encoded region/product, timestamp
+              dates) with no intermediate object-string stage
+
+    read_sales('big.csv.gz', reader='pyarrow')
+    python portfolio_project.py --input big.csv.zst --reader pyarrow
+"""
+
+import glob
+import os
+
+import pandas as pd
+
+SALES_FILE = "sales_data.csv"
+
+# Default rows per chunk when streaming a CSV
+CHUNKSIZE = 1_000_000
+
+
+SALES_DTYPES = {
+    'product': 'category',
+    'region': 'category',
+}
+DATE_COLUMNS = ['date']
+
+READERS = ['pandas', 'pyarrow']
+
+# Compressed inputs, recognised by their last suffix (pandas and pyarrow both
+# pick the codec the same way); zstd needs the zstandard package for pandas
+COMPRESSED_SUFFIXES = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd'}
+SALES_PATTERNS = ['*.csv'] + [f'*.csv{suffix}' for suffix in COMPRESSED_SUFFIXES]
+
+
+def apply_schema(df):
+    """Sort the category labels and downcast revenue to the smallest integer type that fits (in place)."""
+    for col, dtype in SALES_DTYPES.items():
+        if dtype == 'category':
+            # Large reads merge each block's categories in first-seen order;
+            # GROUP BY output and lookups rely on them being sorted
+            df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    if pd.api.types.is_integer_dtype(df['revenue']):
+        df['revenue'] = pd.to_numeric(df['revenue'], downcast='integer')
+    return df
+
+
+def compression_of(path):
+    """The codec a sales file is compressed with, or None for plain CSV."""
+    return COMPRESSED_SUFFIXES.get(os.path.splitext(str(path))[1].lower())
+
+
+def read_sales(path=SALES_FILE, reader='pandas'):
+    """Read the whole sales file using the compact schema."""
+    if _check_reader(reader) == 'pyarrow':
+        return _arrow_frame(_pyarrow_csv().read_csv(path, convert_options=_arrow_convert_options()))
+    df = pd.read_csv(path, dtype=SALES_DTYPES, parse_dates=DATE_COLUMNS)
+    return apply_schema(df)
+
+
+def iter_sales_chunks(path=SALES_FILE, chunksize=CHUNKSIZE, reader='pandas'):
+    """Yield the sales file as DataFrames of at most `chunksize` rows."""
+    if _check_reader(reader) == 'pyarrow':
+        yield from _iter_arrow_chunks(path, chunksize)
+        return
+    with pd.read_csv(path, dtype=SALES_DTYPES, parse_dates=DATE_COLUMNS, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield apply_schema(chunk)
+
+
+# ============================================
+# PYARROW READER (optional dependency)
+# ============================================
+def _check_reader(reader):
+    if reader not in READERS:
+        raise ValueError(f"unknown CSV reader '{reader}' (choose from {', '.join(READERS)})")
+    return reader
+
+
+def _pyarrow_csv():
+    try:
+        import pyarrow.csv
+    except ImportError:
+        raise ImportError("the pyarrow reader needs the pyarrow package (pip install pyarrow)") from None
+    return pyarrow.csv
+
+
+def _arrow_convert_options():
+    import pyarrow as pa
+
+    # Declared types skip Arrow's type inference; region/product are parsed
+    # straight into dictionary codes. Revenue is left to inference so a file
+    # with fractional revenue still loads (as float, like the pandas reader)
+    return _pyarrow_csv().ConvertOptions(column_types={
+        'date': pa.timestamp('us'),
+        'product': pa.dictionary(pa.int32(), pa.string()),
+        'region': pa.dictionary(pa.int32(), pa.string()),
+    })
+
+
+def _arrow_frame(table):
+    # Every block of a multi-threaded read has its own dictionary; unify
+    # them so each column converts to one pandas Categorical
+    return apply_schema(table.unify_dictionaries().to_pandas())
+
+
+def _iter_arrow_chunks(path, chunksize):
+    import pyarrow as pa
+
+    # The streaming reader hands back Arrow-sized record batches; re-cut
+    # them into chunks of exactly `chunksize` rows like the pandas reader
+    pending, rows = [], 0
+    with _pyarrow_csv().open_csv(path, convert_options=_arrow_convert_options()) as stream:
+        for batch in stream:
+            pending.append(batch)
+            rows += batch.num_rows
+            while rows >= chunksize:
+                table = pa.Table.from_batches(pending)
+                yield _arrow_frame(table.slice(0, chunksize))
+                rest = table.slice(chunksize)
+                pending, rows = rest.to_batches(), rest.num_rows
+    if rows:
+        yield _arrow_frame(pa.Table.from_batches(pending))
+
+
+def memory_report(path=SALES_FILE):
+    """Compare memory of the old load (object strings + month columns) with the compact schema.
+
+    Returns a DataFrame of bytes per column: before, after.
+    """
+    # Before: how the scripts used to load and extend the data
+    before = pd.read_csv(path)
+    dates = pd.to_datetime(before['date'])
+    before['month'] = dates.dt.month
+    before['month_name'] = dates.dt.strftime('%B')
+    before['month_num'] = dates.dt.month
+
+    after = read_sales(path)
+
+    report = pd.DataFrame({
+        'before': before.memory_usage(index=False, deep=True),
+        'after': after.memory_usage(index=False, deep=True),
+    }).fillna(0).astype('int64')
+    report.loc['TOTAL'] = report.sum()
+    return report
+
+
+def resolve_input_paths(spec):
+    """Turn a file, a directory or a glob pattern into a sorted list of files.
+
+    A directory contributes its plain and compressed CSVs (*.csv, *.csv.gz, ...).
+    """
+    if os.path.isdir(spec):
+        return sorted(path for pattern in SALES_PATTERNS for path in glob.glob(os.path.join(spec, pattern)))
+    if glob.has_magic(spec):
+        return sorted(glob.glob(spec))
+    return [spec]
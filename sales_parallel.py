@@ -0,0 +1,57 @@
+# Parallel aggregation across many sales files (e.g. one CSV per day)
+
+"""
+Each file is aggregated on its own in a process pool, then the partial
+aggregates are merged IN FILE ORDER - the result is the same as reading
+all the files back to back as one big CSV.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sales_cache import load_sales
+from sales_engine import TIMELINE_K, TOP_K, aggregate_csv, build_aggregate
+
+
+def _aggregate_file(path, chunksize, top_k, timeline_k, use_cache, verify_cache, reader):
+    # Runs inside a worker process
+    start = time.perf_counter()
+    if chunksize:
+        agg = aggregate_csv(path, chunksize=chunksize, top_k=top_k, timeline_k=timeline_k,
+                            use_cache=use_cache, verify_cache=verify_cache, reader=reader)
+    else:
+        agg = build_aggregate(load_sales(path, use_cache=use_cache, verify=verify_cache, reader=reader),
+                              top_k=top_k, timeline_k=timeline_k)
+    return agg, time.perf_counter() - start
+
+
+def aggregate_files(paths, workers=None, chunksize=None, top_k=TOP_K, timeline_k=TIMELINE_K,
+                    use_cache=True, verify_cache=False, reader='pandas'):
+    """Aggregate every file in `paths` on up to `workers` processes.
+
+    Returns (aggregate, timings) where timings is a list of
+    (path, seconds, rows) in file order.
+    """
+    if not paths:
+        raise ValueError("no sales files to aggregate")
+    workers = workers or os.cpu_count() or 1
+    args = [(path, chunksize, top_k, timeline_k, use_cache, verify_cache, reader) for path in paths]
+
+    if workers == 1 or len(paths) == 1:
+        results = (_aggregate_file(*a) for a in args)
+        return _merge_results(paths, results)
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        # map() hands results back in file order, so we can merge as they arrive
+        results = pool.map(_aggregate_file, *zip(*args))
+        return _merge_results(paths, results)
+
+
+def _merge_results(paths, results):
+    agg = None
+    timings = []
+    for path, (partial, seconds) in zip(paths, results):
+        timings.append((path, seconds, partial.total_transactions))
+        agg = partial if agg is None else agg.merge(partial)
+    return agg, timings
@@ -0,0 +1,318 @@
+# Query planner for the challenges.py queries: shared work done once
+
+"""
+challenges.py answers 15 questions one at a time, and several of them
+redo the same work. Challenges 5, 10 and 12 all group by product, 6, 7, 13
+and 15 all group by region, and 8 and 11 both sort by revenue. Here each
+challenge is DECLARED as the intermediate results it needs (nodes) plus a
+small finishing step. A batch of queries is then planned together:
+
+    Group    SUM / COUNT of revenue by some of region and product. Every
+             group node in the batch comes from ONE groupby on the union of
+             their keys. Coarser groupings are rolled up from it: sums and
+             counts add, and an average is sum / count. A filtered total
+             whose filters are equalities on group keys (challenge 10) is a
+             lookup in that table.
+    Where    one boolean mask per distinct predicate. Filters that combine
+             several predicates AND the shared masks.
+    Order    one sort per column, shared by every ORDER BY on it. A batch
+             with only ORDER BY ... LIMIT n picks the top n without sorting.
+
+    from sales_query import plan_queries
+
+    plan = plan_queries(df)              # all 15, or plan_queries(df, [5, 10, 12])
+    print(plan.explain())                # the shared steps and who uses them
+    results = plan.run()                 # {challenge number: result}
+    plan.timings                         # seconds per step and per query
+
+    python sales_query.py --explain
+    python sales_query.py --input sales_data.csv --challenge 5 --challenge 12
+
+Results equal challenge_queries.py's, except that ties in challenge 8's
+ORDER BY revenue DESC always keep file order (as in sales_sql.py).
+"""
+
+import argparse
+import time
+from collections import namedtuple
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from sales_io import SALES_FILE, read_sales
+from sales_topn import top_positions
+from sales_trace import span
+
+# ============================================
+# NODES - the shareable intermediate results
+# ============================================
+# WHERE column <op> value; op is '==', 'in' (value is a tuple) or '>'
+Where = namedtuple('Where', ['column', 'op', 'value'])
+# Rows matching every predicate (AND)
+Filter = namedtuple('Filter', ['predicates'])
+# SUM(revenue), COUNT(*) GROUP BY keys (a tuple; () = grand total), WHERE predicates
+Group = namedtuple('Group', ['keys', 'where'])
+# Row positions ORDER BY column DESC (ties in file order), first `limit` only
+Order = namedtuple('Order', ['column', 'limit'])
+
+# A challenge: the nodes it needs and how to turn them into its result.
+# finish(df, *node results) - node results in the order of `needs`
+Query = namedtuple('Query', ['name', 'sql', 'needs', 'finish'])
+
+GROUP_COLUMNS = ['region', 'product']
+
+
+def group(*keys, where=()):
+    return Group(tuple(keys), tuple(where))
+
+
+def _best_product_by_region(df, cells):
+    # Highest revenue product per region (first product on ties), regions in
+    # order of first appearance - as the loop in challenges.py prints them
+    sums = cells['sum']
+    order = np.lexsort((
+        sums.index.codes[1], -sums.to_numpy(dtype='float64'), sums.index.codes[0],
+    ))
+    best = sums.iloc[order].groupby(level='region', observed=True).head(1)
+    best = {region: (product, revenue) for (region, product), revenue in best.items()}
+    return {region: best[region] for region in df['region'].unique()}
+
+
+QUERIES = {
+    1: Query('select_date_revenue', "SELECT date, revenue FROM sales",
+             (), lambda df: df[['revenue', 'date']]),
+    2: Query('high_revenue_sales', "SELECT * FROM sales WHERE revenue > 1200",
+             (Filter((Where('revenue', '>', 1200),)),), lambda df, mask: df[mask]),
+    3: Query('west_region_sales', "SELECT * FROM sales WHERE region = 'West'",
+             (Filter((Where('region', '==', 'West'),)),), lambda df, mask: df[mask]),
+    4: Query('total_revenue', "SELECT SUM(revenue) FROM sales",
+             (group(),), lambda df, total: total['sum']),
+    5: Query('revenue_by_product', "SELECT product, SUM(revenue) FROM sales GROUP BY product",
+             (group('product'),), lambda df, g: g['sum'].rename('revenue')),
+    6: Query('sales_count_by_region', "SELECT region, COUNT(*) FROM sales GROUP BY region",
+             (group('region'),), lambda df, g: g['count'].rename('revenue')),
+    7: Query('average_revenue_by_region', "SELECT region, AVG(revenue) FROM sales GROUP BY region",
+             (group('region'),), lambda df, g: (g['sum'] / g['count']).rename('revenue')),
+    8: Query('sales_sorted_by_revenue', "SELECT * FROM sales ORDER BY revenue DESC",
+             (Order('revenue', None),), lambda df, order: df.iloc[order]),
+    9: Query('east_product_a_sales', "SELECT * FROM sales WHERE region = 'East' AND product = 'A'",
+             (Filter((Where('region', '==', 'East'), Where('product', '==', 'A'))),),
+             lambda df, mask: df[mask]),
+    10: Query('product_b_revenue', "SELECT SUM(revenue) FROM sales WHERE product = 'B'",
+              (group(where=[Where('product', '==', 'B')]),), lambda df, total: total['sum']),
+    11: Query('top_3_sales', "SELECT * FROM sales ORDER BY revenue DESC LIMIT 3",
+              (Order('revenue', 3),), lambda df, order: df.iloc[order]),
+    12: Query('product_stats', "SELECT product, SUM(revenue), AVG(revenue), COUNT(*) FROM sales GROUP BY product",
+              (group('product'),),
+              lambda df, g: pd.DataFrame({'sum': g['sum'], 'mean': g['sum'] / g['count'], 'count': g['count']})),
+    13: Query('region_revenue_percentages', "SELECT region, SUM(revenue) * 100 / total FROM sales GROUP BY region",
+              (group('region'), group()),
+              lambda df, g, total: (g['sum'] / total['sum'] * 100).rename('revenue')),
+    14: Query('high_value_east_west_sales',
+              "SELECT * FROM sales WHERE revenue > 1000 AND (region = 'East' OR region = 'West')",
+              (Filter((Where('revenue', '>', 1000), Where('region', 'in', ('East', 'West')))),),
+              lambda df, mask: df[mask]),
+    15: Query('best_product_by_region', "Best product (highest SUM(revenue)) in each region",
+              (group('region', 'product'),), _best_product_by_region),
+}
+
+
+# ============================================
+# PLANNING AND RUNNING A BATCH
+# ============================================
+def _describe(node):
+    if isinstance(node, Where):
+        value = ', '.join(map(str, node.value)) if node.op == 'in' else node.value
+        return f"{node.column} {node.op} {value}"
+    if isinstance(node, Filter):
+        return "where " + " and ".join(_describe(p) for p in node.predicates)
+    if isinstance(node, Group):
+        text = f"group by {', '.join(node.keys)}" if node.keys else "grand total"
+        return text + "".join(f" [{_describe(p)}]" for p in node.where)
+    return f"order by {node.column} desc" + (f" limit {node.limit}" if node.limit else "")
+
+
+def _mask(df, predicate):
+    column = df[predicate.column]
+    if predicate.op == '==':
+        return (column == predicate.value).to_numpy()
+    if predicate.op == 'in':
+        return column.isin(predicate.value).to_numpy()
+    if predicate.op == '>':
+        return (column > predicate.value).to_numpy()
+    raise ValueError(f"unknown operator '{predicate.op}'")
+
+
+def _key_lookup(predicate):
+    # A filter the shared group-by can answer: equality on a group column
+    return predicate.column in GROUP_COLUMNS and predicate.op in ('==', 'in')
+
+
+class QueryPlan:
+    """A batch of declared queries, planned so shared nodes run once."""
+
+    def __init__(self, df, numbers=None, queries=QUERIES):
+        self.df = df
+        self.numbers = sorted(queries) if numbers is None else list(numbers)
+        unknown = set(self.numbers) - set(queries)
+        if unknown:
+            raise ValueError(f"no query {', '.join(map(str, sorted(unknown)))}")
+        self.queries = {number: queries[number] for number in self.numbers}
+
+        # Every node, once, with the queries that use it
+        self.users = {}
+        for number, query in self.queries.items():
+            for node in query.needs:
+                self.users.setdefault(node, []).append(number)
+
+        groups = [node for node in self.users if isinstance(node, Group)]
+        # The one real group-by: union of all keys, plus the columns of
+        # filters it can answer by lookup
+        keys = set()
+        for node in groups:
+            keys.update(node.keys)
+            if all(map(_key_lookup, node.where)):
+                keys.update(p.column for p in node.where)
+        self.group_keys = [column for column in GROUP_COLUMNS if column in keys]
+
+        orders = [node for node in self.users if isinstance(node, Order)]
+        # Columns needing a full sort (shared by their LIMIT queries too)
+        self.full_sorts = {node.column for node in orders if node.limit is None}
+        self.timings = []
+
+    def explain(self):
+        """The plan as text: shared steps and the queries using each one."""
+        lines = [f"Plan for {len(self.queries)} queries ({len(self.users)} distinct nodes):"]
+        if any(isinstance(node, Group) for node in self.users):
+            lines.append(f"  1 group-by on {', '.join(self.group_keys) or '(all rows)'}, SUM + COUNT of revenue")
+        for node, users in self.users.items():
+            how = ""
+            if isinstance(node, Group):
+                if not all(map(_key_lookup, node.where)):
+                    how = " (own group-by over the filtered rows)"
+                else:
+                    how = " (lookup)" if node.where else " (rolled up)" if list(node.keys) != self.group_keys else ""
+            elif isinstance(node, Order):
+                how = " (shared sort)" if node.column in self.full_sorts else " (top-n pick)"
+            lines.append(f"  {_describe(node):<52}{how:<18} -> {', '.join(map(str, users))}")
+        return "\n".join(lines)
+
+    # ----------------------------------------
+    # Node evaluation
+    # ----------------------------------------
+    def _timed(self, kind, name, func):
+        start = time.perf_counter()
+        with span(name, 'query', len(self.df)):
+            result = func()
+        self.timings.append((kind, name, time.perf_counter() - start))
+        return result
+
+    def _cells(self):
+        df = self.df
+        if not self.group_keys:
+            return pd.Series({'sum': df['revenue'].sum(), 'count': len(df)})
+        return df.groupby(self.group_keys, observed=True)['revenue'].agg(['sum', 'count'])
+
+    def _group(self, node, cells, masks):
+        if not all(map(_key_lookup, node.where)):
+            mask = reduce(np.logical_and, (masks[p] for p in node.where))
+            sub = self.df[mask]
+            if not node.keys:
+                return pd.Series({'sum': sub['revenue'].sum(), 'count': len(sub)})
+            return sub.groupby(list(node.keys), observed=True)['revenue'].agg(['sum', 'count'])
+
+        table = cells
+        if isinstance(table, pd.DataFrame):
+            for predicate in node.where:
+                level = table.index.get_level_values(predicate.column)
+                values = predicate.value if predicate.op == 'in' else [predicate.value]
+                table = table[level.isin(values)]
+            if not node.keys:
+                return table.sum()
+            if list(node.keys) != self.group_keys:
+                table = table.groupby(level=list(node.keys), observed=True).sum()
+        return table
+
+    def _order(self, node, sorts):
+        if node.column in sorts:
+            order = sorts[node.column]
+            return order if node.limit is None else order[:node.limit]
+        return top_positions(self.df[node.column].to_numpy(), node.limit)
+
+    def run(self):
+        """Evaluate every node once, then finish each query. Returns {number: result}."""
+        self.timings = []
+        nodes = list(self.users)
+        values = {}
+
+        # Shared scans first: one group-by, one mask per predicate, one sort per column
+        cells = None
+        if any(isinstance(node, Group) for node in nodes):
+            cells = self._timed('step', f"group by {', '.join(self.group_keys) or 'all'}", self._cells)
+        predicates = {p for node in nodes if isinstance(node, Filter) for p in node.predicates}
+        predicates |= {p for node in nodes if isinstance(node, Group) and not all(map(_key_lookup, node.where))
+                       for p in node.where}
+        masks = {p: self._timed('step', _describe(p), lambda p=p: _mask(self.df, p)) for p in predicates}
+        sorts = {
+            column: self._timed('step', f"sort by {column} desc",
+                                lambda column=column: top_positions(self.df[column].to_numpy(), len(self.df)))
+            for column in sorted(self.full_sorts)
+        }
+
+        for node in nodes:
+            if isinstance(node, Filter):
+                compute = lambda node=node: reduce(np.logical_and, (masks[p] for p in node.predicates))
+            elif isinstance(node, Group):
+                compute = lambda node=node: self._group(node, cells, masks)
+            else:
+                compute = lambda node=node: self._order(node, sorts)
+            values[node] = self._timed('step', _describe(node), compute)
+
+        results = {}
+        for number, query in self.queries.items():
+            args = [values[node] for node in query.needs]
+            results[number] = self._timed('query', f"{number:02d} {query.name}",
+                                          lambda query=query, args=args: query.finish(self.df, *args))
+        return results
+
+    def timing_table(self):
+        """Timings of the last run as a DataFrame (kind, name, seconds)."""
+        return pd.DataFrame(self.timings, columns=['kind', 'name', 'seconds'])
+
+
+def plan_queries(df, numbers=None):
+    """QueryPlan over `df` for the given challenge numbers (default: all 15)."""
+    return QueryPlan(df, numbers)
+
+
+# ============================================
+# COMMAND LINE
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the challenges.py queries as one planned batch")
+    parser.add_argument('--input', default=SALES_FILE, help="sales CSV")
+    parser.add_argument('--challenge', type=int, action='append', choices=sorted(QUERIES),
+                        help="run only these challenges (repeatable; default: all)")
+    parser.add_argument('--explain', action='store_true', help="print the plan before running it")
+    parser.add_argument('--quiet', action='store_true', help="timings only, no results")
+    args = parser.parse_args(argv)
+
+    plan = plan_queries(read_sales(args.input), args.challenge)
+    if args.explain:
+        print(plan.explain())
+    results = plan.run()
+    if not args.quiet:
+        for number, result in results.items():
+            print(f"\n🎯 CHALLENGE {number}: {plan.queries[number].sql}")
+            print("-" * 70)
+            print(result)
+
+    print("\n⏱️  Timings:")
+    for kind, name, seconds in plan.timings:
+        print(f"  {kind:<6}{name:<60}{seconds * 1000:9.2f} ms")
+    print(f"  {'total':<66}{sum(t for _, _, t in plan.timings) * 1000:9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
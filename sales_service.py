@@ -0,0 +1,349 @@
+# Resident analyzer service: load once, answer over HTTP
+
+"""
+Every `python portfolio_project.py` run pays for starting Python, importing
+pandas and loading the data before it computes anything. The service pays
+that once and keeps the data hot:
+
+    python sales_service.py --input sales_data.csv --port 8765
+    python sales_service.py --input shards/ --socket /tmp/sales.sock
+
+    curl localhost:8765/sections/insights
+    curl localhost:8765/challenges/14
+    curl --unix-socket /tmp/sales.sock http://x/metrics
+
+Endpoints (GET unless noted):
+
+    /health                         rows, load time, data generation
+    /metrics                        headline numbers as JSON
+    /dashboard                      whole dashboard as text
+    /sections/<name>                one section: summary, regional, products,
+                                    pivot, timeline, insights, advanced
+                                    (timeline takes ?limit=&page=)
+    /challenges/<1-15>              challenges.py query result as JSON,
+                                    or as printed text with ?format=text
+    POST /reload                    reload now
+
+The input files are checked (size + mtime) before answering, at most once
+per --poll seconds. A change reloads the data and starts a fresh
+generation. Responses are kept in an LRU cache keyed by generation + URL,
+so a reload can never serve stale results.
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from challenge_queries import CHALLENGE_QUERIES, INDEXED_QUERIES
+from sales_analyzer import SalesAnalyzer
+from sales_cache import load_sales
+from sales_index import SalesIndex
+from sales_io import SALES_FILE, resolve_input_paths
+
+DEFAULT_PORT = 8765
+CACHE_SIZE = 256
+POLL_SECONDS = 1.0
+
+SECTIONS = ['header', 'summary', 'regional', 'products', 'pivot', 'timeline', 'insights', 'advanced']
+
+
+class NotFound(Exception):
+    """Unknown endpoint, section or challenge - answered with 404."""
+
+
+class ResultCache:
+    """Thread-safe LRU of rendered responses."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class _Dataset:
+    """One loaded snapshot of the input: rows, dashboard and index."""
+
+    def __init__(self, df, signature, generation):
+        self.df = df
+        self.analyzer = SalesAnalyzer.from_frame(df)
+        self.index = SalesIndex.from_frame(df)
+        # Aggregate now, so the first request after a (re)load is fast too
+        self.analyzer.total_revenue
+        self.signature = signature
+        self.generation = generation
+        self.loaded_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+class SalesService:
+    """Keeps a sales dataset loaded and answers dashboard / challenge requests."""
+
+    def __init__(self, source=SALES_FILE, use_cache=True, cache_size=CACHE_SIZE, poll=POLL_SECONDS):
+        self.source = source
+        self.use_cache = use_cache
+        self.poll = poll
+        self.cache = ResultCache(cache_size)
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self.data = None
+        self.reload()
+
+    # ----------------------------------------
+    # Loading / reloading
+    # ----------------------------------------
+    def _signature(self):
+        paths = resolve_input_paths(self.source)
+        return tuple((path, os.stat(path).st_size, os.stat(path).st_mtime_ns) for path in paths)
+
+    def _read(self, signature):
+        frames = [load_sales(path, use_cache=self.use_cache) for path, _, _ in signature]
+        if not frames:
+            raise FileNotFoundError(f"no sales files match {self.source}")
+        if len(frames) == 1:
+            return frames[0]
+        # Shards may have different category sets - re-categorize after joining
+        df = pd.concat(frames, ignore_index=True)
+        return df.astype({'region': 'category', 'product': 'category'})
+
+    def reload(self):
+        """Load the input again (even if unchanged); returns the new generation."""
+        with self._lock:
+            return self._reload()
+
+    def _reload(self):
+        # Caller holds self._lock: the dataset swap and the cache reset happen together
+        signature = self._signature()
+        generation = 1 if self.data is None else self.data.generation + 1
+        self.data = _Dataset(self._read(signature), signature, generation)
+        self._checked = time.monotonic()
+        self.cache.clear()
+        return generation
+
+    def current(self):
+        """The loaded dataset, reloaded first if the input files changed."""
+        if time.monotonic() - self._checked < self.poll:
+            return self.data
+        with self._lock:
+            # Another request may have checked (and reloaded) while we waited
+            now = time.monotonic()
+            if now - self._checked >= self.poll:
+                self._checked = now
+                try:
+                    changed = self._signature() != self.data.signature
+                except OSError:
+                    # Mid-rewrite (file briefly missing) - keep serving what we have
+                    changed = False
+                if changed:
+                    self._reload()
+            return self.data
+
+    # ----------------------------------------
+    # Answers - each returns (content type, body bytes)
+    # ----------------------------------------
+    def handle(self, path, query):
+        """Cached answer for GET `path` with parsed `query` params."""
+        data = self.current()
+        if path.strip('/') == 'health':
+            # Live counters - never cached
+            return self._answer(data, path, query) + ('miss',)
+        key = (data.generation, path, tuple(sorted((k, tuple(v)) for k, v in query.items())))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached + ('hit',)
+        answer = self._answer(data, path, query)
+        with self._lock:
+            # Not if a reload replaced `data` meanwhile - the cache belongs to the new generation
+            if data is self.data:
+                self.cache.put(key, answer)
+        return answer + ('miss',)
+
+    def _answer(self, data, path, query):
+        parts = [part for part in path.split('/') if part]
+        analyzer = data.analyzer
+
+        if parts == ['health']:
+            return _json({
+                'status': 'ok',
+                'source': self.source,
+                'rows': len(data.df),
+                'generation': data.generation,
+                'loaded_at': data.loaded_at,
+                'cache': {'hits': self.cache.hits, 'misses': self.cache.misses},
+            })
+        if parts == ['metrics']:
+            return _json({
+                'total_revenue': analyzer.total_revenue,
+                'total_transactions': analyzer.total_transactions,
+                'average_sale': analyzer.average_sale,
+                'data_period': analyzer.data_period,
+                'top_region': analyzer.top_region,
+                'top_product': analyzer.top_product,
+                'best_month': analyzer.best_month,
+            })
+        if parts == ['dashboard']:
+            limit, page_number = _timeline_args(query)
+            return _text(analyzer.dashboard(limit, page_number))
+        if len(parts) == 2 and parts[0] == 'sections':
+            name = parts[1]
+            if name not in SECTIONS:
+                raise NotFound(f"unknown section '{name}' (choose from {', '.join(SECTIONS)})")
+            if name == 'timeline':
+                return _text(analyzer.timeline(*_timeline_args(query)))
+            return _text(getattr(analyzer, name)())
+        if len(parts) == 2 and parts[0] == 'challenges':
+            number = int(parts[1]) if parts[1].isdigit() else None
+            if number not in CHALLENGE_QUERIES:
+                raise NotFound(f"no challenge {parts[1]} (choose 1-{len(CHALLENGE_QUERIES)})")
+            if number in INDEXED_QUERIES:
+                result = INDEXED_QUERIES[number](data.df, data.index)
+            else:
+                result = CHALLENGE_QUERIES[number](data.df)
+            if query.get('format', ['json'])[0] == 'text':
+                return _text(str(result))
+            return _json(_jsonable(result))
+        raise NotFound(f"no endpoint {path}")
+
+
+def _timeline_args(query):
+    limit = query.get('limit', [None])[0]
+    return (int(limit) if limit else None), int(query.get('page', ['1'])[0])
+
+
+def _text(body):
+    return 'text/plain; charset=utf-8', (body + '\n').encode('utf-8')
+
+
+def _json(payload):
+    return 'application/json', (json.dumps(payload, default=_json_default) + '\n').encode('utf-8')
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _jsonable(result):
+    """Challenge results (DataFrame / Series / dict / scalar) as plain JSON data."""
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return json.loads(result.to_json(orient='split', date_format='iso'))
+    if isinstance(result, dict):
+        return {str(key): value for key, value in result.items()}
+    return result
+
+
+# ============================================
+# HTTP
+# ============================================
+class _Handler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            content_type, body, cache = self.service.handle(url.path, parse_qs(url.query))
+        except NotFound as error:
+            return self._send(404, *_json({'error': str(error)}))
+        except ValueError as error:
+            return self._send(400, *_json({'error': str(error)}))
+        except Exception as error:
+            # A bug, not a missing resource - log it and answer 500
+            self.log_error("error answering %s", self.path)
+            traceback.print_exc()
+            return self._send(500, *_json({'error': f"{type(error).__name__}: {error}"}))
+        self._send(200, content_type, body, {'X-Cache': cache})
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/reload':
+            return self._send(404, *_json({'error': f"no endpoint {self.path}"}))
+        self._send(200, *_json({'generation': self.service.reload()}))
+
+    def _send(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host='127.0.0.1', port=DEFAULT_PORT, socket_path=None):
+    """HTTP server for `service` on host:port, or on a Unix socket if socket_path is given."""
+    handler = type('SalesHandler', (_Handler,), {'service': service})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        return _UnixHTTPServer(socket_path, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the sales dashboard and challenge queries over HTTP")
+    parser.add_argument('--input', default=SALES_FILE, help="sales CSV, folder of CSVs or glob pattern")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--socket', help="listen on this Unix socket instead of TCP")
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help="responses kept in the LRU cache")
+    parser.add_argument('--poll', type=float, default=POLL_SECONDS,
+                        help="seconds between checks of the input files for changes")
+    parser.add_argument('--no-cache', action='store_true', help="don't use the columnar file cache")
+    args = parser.parse_args(argv)
+
+    service = SalesService(args.input, use_cache=not args.no_cache, cache_size=args.cache_size, poll=args.poll)
+    server = make_server(service, args.host, args.port, args.socket)
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"📡 Serving {len(service.data.df):,} sales from {args.input} on {where}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,349 @@
+# Mergeable sketches of sale values: quantiles, histograms, distinct days
+
+"""
+Exact medians and percentiles per region and product need every sale
+value sorted. These sketches are kept per (region, product) while the rows
+stream in. Like the aggregate's cells, two sketches of different slices of
+the data merge into the sketch of the whole.
+
+    quantiles       DDSketch: each sale is counted in a logarithmic bucket
+                    ceil(log_gamma(value)), gamma = (1 + a) / (1 - a). A
+                    quantile read from the buckets is within a relative
+                    error of a = RELATIVE_ACCURACY (1%) of the exact
+                    nearest-rank quantile (the ceil(q * n)-th smallest
+                    sale): the real median $1,000 comes back as $990 -
+                    $1,010.
+                    Sales from $1 to $1,000,000 fit in ~700 buckets per
+                    (region, product) pair, whatever the row count.
+    histogram       sales counted per revenue band (sales_cube.BAND_EDGES).
+                    Exact.
+    distinct days   HyperLogLog over the sale dates: 2^HLL_PRECISION
+                    registers per pair, standard error 1.04 / sqrt(4096)
+                    = 1.6%, so about 95% of counts are within ±3.2%
+                    (e.g. 800 real days may read 811). Small counts use
+                    linear counting, with a similar error.
+
+Merging adds bucket and band counts and takes the max of HLL registers.
+Any region / product rollup is computed from the per-pair sketches, so the
+dashboard can show the overall, per-region and per-product medians from a
+single pass:
+
+    sketches = analyzer.agg.sketches
+    sketches.quantiles(by='region')       # p50 / p90 / p99 per region
+    sketches.histogram(by='product')      # sales per revenue band
+    sketches.distinct_days()              # days with at least one sale
+"""
+
+import numpy as np
+import pandas as pd
+
+from sales_cube import BAND_EDGES, _band_of
+
+RELATIVE_ACCURACY = 0.01
+HLL_PRECISION = 12
+
+QUANTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+PAIR_KEYS = ['region', 'product']
+GROUPINGS = ['region', 'product']
+
+# Each sketch table: its key level and how two entries for the same key combine
+TABLES = {'values': ('bucket', 'sum'), 'bands': ('band', 'sum'), 'registers': ('register', 'max')}
+
+# The groupings a SketchRollups keeps: overall, per region, per product
+ROLLUPS = [(), ('region',), ('product',)]
+
+# Positive bucket keys are shifted by this much so that, with zero at 0 and
+# negatives mirrored below it, key order is value order
+_KEY_OFFSET = 1 << 20
+
+
+# ============================================
+# QUANTILE BUCKETS
+# ============================================
+def _gamma(accuracy):
+    return (1 + accuracy) / (1 - accuracy)
+
+
+def bucket_keys(values, accuracy=RELATIVE_ACCURACY):
+    """DDSketch bucket key of each value (sorted the same way as the values)."""
+    values = np.asarray(values, dtype='float64')
+    magnitude = np.abs(values)
+    with np.errstate(divide='ignore'):
+        keys = np.ceil(np.log(magnitude) / np.log(_gamma(accuracy)))
+    keys = np.where(magnitude > 0, keys + _KEY_OFFSET, 0).astype('int64')
+    return np.where(values < 0, -keys, keys)
+
+
+def bucket_values(keys, accuracy=RELATIVE_ACCURACY):
+    """Representative value of each bucket (within `accuracy` of all its members)."""
+    keys = np.asarray(keys, dtype='int64')
+    gamma = _gamma(accuracy)
+    magnitude = 2 * gamma ** (np.abs(keys) - _KEY_OFFSET).astype('float64') / (gamma + 1)
+    return np.where(keys == 0, 0.0, np.sign(keys) * magnitude)
+
+
+# ============================================
+# HYPERLOGLOG REGISTERS
+# ============================================
+def hll_registers(hashes, precision=HLL_PRECISION):
+    """(register, rank) for 64-bit hashes: first `precision` bits pick the register,
+    rank = leading zeros in the remaining bits + 1."""
+    hashes = np.asarray(hashes, dtype='uint64')
+    width = 64 - precision
+    register = (hashes >> np.uint64(width)).astype('int64')
+    rest = hashes & np.uint64((1 << width) - 1)
+    # Bit length of `rest` in exact float steps: the high and low 32 bits
+    high = (rest >> np.uint64(32)).astype('float64')
+    low = (rest & np.uint64(0xFFFFFFFF)).astype('float64')
+    bits = np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+    return register, (width - bits + 1).astype('uint8')
+
+
+def hll_estimate(ranks, groups, precision=HLL_PRECISION):
+    """Distinct-count estimate per group from its non-empty registers.
+
+    `ranks` holds one entry per (group, register) that is set; `groups` are
+    the group codes 0..n-1 of those entries.
+    """
+    m = 1 << precision
+    n_groups = int(groups.max()) + 1 if len(groups) else 0
+    # Empty registers contribute 2^0 = 1 each to the harmonic sum
+    used = np.bincount(groups, minlength=n_groups)
+    harmonic = np.bincount(groups, weights=np.exp2(-ranks.astype('float64')), minlength=n_groups) + (m - used)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / harmonic
+    empty = m - used
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / np.maximum(empty, 1))
+    return np.where((raw <= 2.5 * m) & (empty > 0), linear, raw)
+
+
+# ============================================
+# THE SKETCHES
+# ============================================
+class SaleSketches:
+    """Quantile buckets, revenue-band counts and HLL registers per (region, product)."""
+
+    def __init__(self, values, bands, registers, accuracy=RELATIVE_ACCURACY, precision=HLL_PRECISION,
+                 edges=BAND_EDGES):
+        # values: sale count per (region, product, bucket)
+        self.values = values
+        # bands: sale count per (region, product, band)
+        self.bands = bands
+        # registers: HLL rank per (region, product, register) - set registers only
+        self.registers = registers
+        self.accuracy = accuracy
+        self.precision = precision
+        self.edges = list(edges)
+
+    @classmethod
+    def from_rows(cls, region, product, revenue, daily, accuracy=RELATIVE_ACCURACY,
+                  precision=HLL_PRECISION, edges=BAND_EDGES):
+        """From the sales rows (region, product, revenue Series) and their daily table."""
+        return cls.from_value_counts(region, product, revenue, None, daily, accuracy, precision, edges)
+
+    @classmethod
+    def from_value_counts(cls, region, product, revenue, counts, daily, accuracy=RELATIVE_ACCURACY,
+                          precision=HLL_PRECISION, edges=BAND_EDGES):
+        """From distinct (region, product, revenue) rows with their counts (counts=None: one each).
+
+        The SQL backends hand in GROUP BY region, product, revenue results.
+        """
+        counts = np.ones(len(revenue), dtype='int64') if counts is None else np.asarray(counts, dtype='int64')
+        buckets = bucket_keys(revenue, accuracy)
+        bands = _band_of(revenue, np.asarray(edges, dtype=float))
+        return cls(
+            _tally(region, product, buckets, 'bucket', counts, np.add),
+            _tally(region, product, bands, 'band', counts, np.add),
+            _day_registers(daily, precision),
+            accuracy, precision, edges,
+        )
+
+    def merge(self, other):
+        """Sketch of both slices of the data."""
+        if (self.accuracy, self.precision, self.edges) != (other.accuracy, other.precision, other.edges):
+            raise ValueError("cannot merge sketches with different settings")
+        return SaleSketches(
+            _combine(self.values, other.values, 'sum'),
+            _combine(self.bands, other.bands, 'sum'),
+            _combine(self.registers, other.registers, 'max'),
+            self.accuracy, self.precision, self.edges,
+        )
+
+    def rollups(self):
+        """The overall / per-region / per-product tables, without the per-pair ones."""
+        return SketchRollups({(name, by): self._rolled_up(name, list(by)) for name in TABLES for by in ROLLUPS},
+                             self.accuracy, self.precision, self.edges)
+
+    def _rolled_up(self, name, by):
+        # Table `name` summed / maxed into the `by` groups
+        key, how = TABLES[name]
+        return _rollup(getattr(self, name), by, key, how)
+
+    # ----------------------------------------
+    # Reading the sketches
+    # ----------------------------------------
+    def quantiles(self, qs=QUANTILES, by=None):
+        """{name: q} quantiles of sale value: a Series (by=None) or one row per group."""
+        by = _grouping(by)
+        counts = self._rolled_up('values', by)
+        keys = counts.index.get_level_values('bucket').to_numpy()
+        starts, groups = _group_starts(counts, by)
+        n = counts.to_numpy()
+        before = np.cumsum(n) - n
+        cumulative = np.cumsum(n)
+        totals = np.add.reduceat(n, starts) if len(n) else n
+
+        table = {}
+        for name, q in qs.items():
+            # Nearest rank within each group (the ceil(q * n)-th sale), as a
+            # position in the global cumsum
+            target = before[starts] + np.maximum(np.ceil(q * totals) - 1, 0)
+            table[name] = bucket_values(keys[np.searchsorted(cumulative, target, side='right')], self.accuracy)
+        if not by:
+            return pd.Series({name: values[0] for name, values in table.items()})
+        return pd.DataFrame(table, index=groups)
+
+    def histogram(self, by=None):
+        """Sales per revenue band: a Series (by=None) or one row per group."""
+        by = _grouping(by)
+        counts = self._rolled_up('bands', by)
+        labels = band_labels(self.edges)
+        if not by:
+            return counts.reindex(range(len(labels)), fill_value=0).set_axis(labels)
+        table = counts.unstack('band', fill_value=0)
+        return table.reindex(columns=range(len(labels)), fill_value=0).set_axis(labels, axis=1)
+
+    def distinct_days(self, by=None):
+        """Estimated number of days with sales: a number (by=None) or a Series per group."""
+        by = _grouping(by)
+        ranks = self._rolled_up('registers', by)
+        starts, groups = _group_starts(ranks, by)
+        codes = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(ranks)]))
+        estimate = hll_estimate(ranks.to_numpy(), codes, self.precision).round()
+        if not by:
+            return int(estimate[0]) if len(estimate) else 0
+        return pd.Series(estimate.astype('int64'), index=groups, name='active_days')
+
+
+class SketchRollups(SaleSketches):
+    """Sketches kept only as the rollups the dashboard reads (see ROLLUPS).
+
+    Much smaller than the per-pair tables when there are many (region,
+    product) pairs. The out-of-core path (sales_spill.py) builds one per
+    hash partition and merges them; the read methods work as usual for
+    by=None, 'region' or 'product'.
+    """
+
+    def __init__(self, tables, accuracy=RELATIVE_ACCURACY, precision=HLL_PRECISION, edges=BAND_EDGES):
+        super().__init__(None, None, None, accuracy, precision, edges)
+        # tables: {(table name, by tuple): rolled-up Series}
+        self.tables = tables
+
+    def merge(self, other):
+        if (self.accuracy, self.precision, self.edges) != (other.accuracy, other.precision, other.edges):
+            raise ValueError("cannot merge sketches with different settings")
+        return SketchRollups(
+            {key: _combine(table, other.tables[key], TABLES[key[0]][1]) for key, table in self.tables.items()},
+            self.accuracy, self.precision, self.edges,
+        )
+
+    def rollups(self):
+        return self
+
+    def _rolled_up(self, name, by):
+        if (name, tuple(by)) not in self.tables:
+            raise ValueError(f"rolled-up sketches split by region or product, not {' × '.join(by)}")
+        return self.tables[name, tuple(by)]
+
+
+def band_labels(edges=BAND_EDGES):
+    """'<= 0', '(0, 100]', ..., '> 10000' for (low, high] bands."""
+    labels = []
+    for low, high in zip(edges[:-1], edges[1:]):
+        if np.isinf(low):
+            labels.append(f'<= {high:g}')
+        elif np.isinf(high):
+            labels.append(f'> {low:g}')
+        else:
+            labels.append(f'({low:g}, {high:g}]')
+    return labels
+
+
+def _day_registers(daily, precision):
+    # daily: revenue indexed by (region, product, date) - one entry per pair and day
+    # Hash day numbers, so the datetime unit (s / ns) doesn't change the hash
+    days = pd.DatetimeIndex(daily.index.get_level_values('date')).to_numpy().astype('datetime64[D]')
+    register, rank = hll_registers(pd.util.hash_array(days.astype('int64')), precision)
+    region, product = (daily.index.get_level_values(level) for level in PAIR_KEYS)
+    return _tally(region, product, register, 'register', rank, np.maximum)
+
+
+def _tally(region, product, keys, name, values, reduce):
+    """`values` reduced (np.add / np.maximum) per (region, product, key), as a sorted Series.
+
+    The three keys are packed into one int64, so there is no three-key
+    groupby hashing every row: counts over a small key space are a single
+    bincount, anything else one sort.
+    """
+    region, product = pd.Categorical(region), pd.Categorical(product)
+    regions, products = region.categories, product.categories
+    # Rows with no region or product (code -1) are dropped, as the observed cells group-by does
+    labelled = (region.codes >= 0) & (product.codes >= 0)
+    region_codes, product_codes = region.codes[labelled], product.codes[labelled]
+    keys = np.asarray(keys, dtype='int64')[labelled]
+    values = np.asarray(values)[labelled]
+    low = keys.min() if len(keys) else 0
+    span = (keys.max() - low + 1) if len(keys) else 1
+    packed = (region_codes.astype('int64') * len(products) + product_codes) * span + (keys - low)
+
+    size = len(regions) * len(products) * span
+    if reduce is np.add and size <= 4 * len(packed):
+        totals = np.bincount(packed, weights=values, minlength=size).astype(values.dtype)
+        packed = np.flatnonzero(totals)
+        reduced = totals[packed]
+    else:
+        order = np.argsort(packed)
+        packed = packed[order]
+        starts = np.flatnonzero(np.r_[True, packed[1:] != packed[:-1]]) if len(packed) else packed
+        reduced = reduce.reduceat(values[order], starts) if len(packed) else values
+        packed = packed[starts]
+    # Build the index straight from codes - from_arrays would re-factorize the labels
+    pair, key = np.divmod(packed, span)
+    key_level, key_codes = np.unique(key + low, return_inverse=True)
+    index = pd.MultiIndex(
+        levels=[regions, products, key_level],
+        codes=[pair // len(products), pair % len(products), key_codes],
+        names=PAIR_KEYS + [name],
+    )
+    return pd.Series(reduced, index=index)
+
+
+def _combine(left, right, how):
+    return pd.concat([left, right]).groupby(level=list(left.index.names), observed=True).agg(how)
+
+
+def _rollup(table, by, key, how):
+    # Per-pair sketch entries summed / maxed into the `by` groups
+    return table.groupby(level=by + [key], observed=True).agg(how)
+
+
+def _group_starts(table, by):
+    """Position where each group begins in a (by..., key) sorted table, and the group labels."""
+    if not by:
+        return np.zeros(1 if len(table) else 0, dtype='int64'), None
+    groups = table.index.droplevel(-1)
+    codes = pd.factorize(groups)[0]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    return starts, groups[starts]
+
+
+def _grouping(by):
+    if by is None:
+        return []
+    by = [by] if isinstance(by, str) else list(by)
+    unknown = set(by) - set(GROUPINGS)
+    if unknown:
+        raise ValueError(f"can only split by {' / '.join(GROUPINGS)}, not {', '.join(sorted(unknown))}")
+    return by
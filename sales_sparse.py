@@ -0,0 +1,131 @@
+# Sparse region × product pivot
+
+"""
+With thousands of products and hundreds of regions most region × product
+cells are empty, and a dense pivot spends its memory on zeros. SparsePivot
+keeps only the combinations that sold (COO form: row code, column code,
+revenue - sorted by row, then column) plus the region and product labels.
+
+    best product per region   one lexsort of the stored cells
+    zero-sales gaps           rows are densified a block at a time into a
+                              boolean mask and np.nonzero lists the empty
+                              cells in row-major order - no per-cell lookups
+    region_product_matrix.csv written a block of rows at a time, so the full
+                              dense matrix never exists in memory
+
+Every result matches the dense pivot's (idxmax, pivot == 0, to_csv).
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+# Dense cells materialized at once when walking blocks of rows
+BLOCK_CELLS = 1 << 20
+
+
+class SparsePivot:
+    """Region × product revenue with only the non-empty cells stored."""
+
+    def __init__(self, rows, cols, values, index, columns):
+        self.rows = rows
+        self.cols = cols
+        self.values = values
+        self.index = index
+        self.columns = columns
+
+    @classmethod
+    def from_series(cls, totals):
+        """From revenue indexed by (region, product) - one entry per combination that sold."""
+        rows, index = pd.factorize(totals.index.get_level_values('region'), sort=True)
+        cols, columns = pd.factorize(totals.index.get_level_values('product'), sort=True)
+        order = np.lexsort((cols, rows))
+        return cls(rows[order], cols[order], totals.to_numpy()[order],
+                   index.rename('region'), columns.rename('product'))
+
+    @property
+    def shape(self):
+        return len(self.index), len(self.columns)
+
+    def _blocks(self):
+        """(first row, last row + 1, slice of stored cells) for blocks of rows."""
+        n_rows, n_cols = self.shape
+        step = max(1, BLOCK_CELLS // max(n_cols, 1))
+        bounds = np.searchsorted(self.rows, np.arange(0, n_rows + step, step))
+        for block, start in enumerate(range(0, n_rows, step)):
+            yield start, min(start + step, n_rows), slice(bounds[block], bounds[block + 1])
+
+    def _dense_block(self, start, stop, cells):
+        block = np.zeros((stop - start, len(self.columns)), dtype=self.values.dtype)
+        block[self.rows[cells] - start, self.cols[cells]] = self.values[cells]
+        return block
+
+    def to_dense(self):
+        """The full pivot as a DataFrame (fine for small pivots / display)."""
+        dense = self._dense_block(0, len(self.index), slice(None))
+        return pd.DataFrame(dense, index=self.index, columns=self.columns)
+
+    # ----------------------------------------
+    # Gaps
+    # ----------------------------------------
+    @property
+    def zero_count(self):
+        n_rows, n_cols = self.shape
+        return n_rows * n_cols - int(np.count_nonzero(self.values))
+
+    def zero_cells(self, limit=None):
+        """(region, product) pairs with no revenue, row by row (like np.nonzero(pivot == 0))."""
+        found = []
+        remaining = limit
+        for start, stop, cells in self._blocks():
+            empty = self._dense_block(start, stop, cells) == 0
+            rows, cols = np.nonzero(empty)
+            if remaining is not None:
+                rows, cols = rows[:remaining], cols[:remaining]
+                remaining -= len(rows)
+            found += zip(self.index[rows + start], self.columns[cols])
+            if remaining == 0:
+                break
+        return found
+
+    # ----------------------------------------
+    # Best product per region
+    # ----------------------------------------
+    def row_max(self):
+        """DataFrame: region -> best product and its revenue (first product on ties)."""
+        # Highest revenue first within each row, then lowest column
+        order = np.lexsort((self.cols, -self.values, self.rows))
+        rows = self.rows[order]
+        first = order[np.r_[True, rows[1:] != rows[:-1]]]
+        best_col = self.cols[first]
+        best_value = self.values[first]
+
+        # A row whose best stored value is not positive may have a better (or
+        # earlier) empty cell - rare enough to settle on the dense row
+        n_cols = len(self.columns)
+        counts = np.bincount(self.rows, minlength=len(self.index))
+        for position in np.flatnonzero((best_value <= 0) & (counts[self.rows[first]] < n_cols)):
+            row = self.rows[first[position]]
+            cells = slice(*np.searchsorted(self.rows, [row, row + 1]))
+            dense = self._dense_block(row, row + 1, cells)[0]
+            best_col[position] = dense.argmax()
+            best_value[position] = dense.max()
+
+        return pd.DataFrame(
+            {'product': self.columns[best_col], 'revenue': best_value},
+            index=self.index[self.rows[first]],
+        )
+
+    # ----------------------------------------
+    # CSV export
+    # ----------------------------------------
+    def to_csv(self):
+        """Same text as to_dense().to_csv(), built a block of rows at a time."""
+        out = io.StringIO()
+        pd.DataFrame(columns=self.columns, index=self.index[:0]).to_csv(out)
+        for start, stop, cells in self._blocks():
+            block = pd.DataFrame(self._dense_block(start, stop, cells),
+                                 index=self.index[start:stop], columns=self.columns)
+            block.to_csv(out, header=False)
+        return out.getvalue()
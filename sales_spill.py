@@ -0,0 +1,335 @@
+# Out-of-core aggregation: hash-partitioned spill files under a memory budget
+
+"""
+Streaming a file chunk by chunk keeps memory proportional to the number of
+distinct keys - the cells, daily table and sketches of every (region,
+product) pair seen so far. With store × SKU keys that running aggregate is
+itself too big, and re-merging it with every chunk gets slower as it grows.
+
+This operator caps it (a Grace-style hash aggregation):
+
+  1. Chunks are aggregated and merged as usual while the keyed tables stay
+     under `memory_budget` bytes. The budget check counts what a merge
+     holds at its peak: the running tables, the chunk's partial tables and
+     the concatenated copy the group-by works on (MERGE_FACTOR).
+  2. Over budget, every keyed table is split by hash(region, product) into
+     `partitions` slices and each slice is appended to that partition's
+     spill file in a temp folder. The in-memory tables start empty again.
+     Totals, the top sales and the timeline are small and stay in memory.
+  3. At the end each partition's spilled runs are read back and merged on
+     their own, one partition at a time, and reduced to the rollups the
+     dashboard reads - region / product / month totals, the partition's
+     pivot and forecast rows, sketch rollups. The partition's tables and
+     spill file are then dropped before the next one is loaded. Partitions
+     hold disjoint pairs, so the rollups combine into the final ones.
+
+The result holds those rollups, not the cell / daily tables: its size grows
+with the number of (region, product) pairs that sold (one pivot and one
+forecast row each), not with pairs × months × days. Each partition's merge
+needs roughly 1/`partitions` of the full keyed tables on top of that.
+
+Sums, counts, mins, maxes and sketch registers combine exactly, so the
+dashboard and exports are identical to the in-memory path (for the integer
+revenue of the schema; fractional revenue may differ in the last float
+digit).
+
+    python portfolio_project.py --input big.csv --memory-budget 512MB
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from sales_engine import CELL_KEYS, CELL_MERGE, DAILY_KEYS, TOP_K, TIMELINE_K, SalesAggregate, build_aggregate
+from sales_forecast import forecast_table
+from sales_sketch import SaleSketches
+from sales_sparse import SparsePivot
+from sales_timeseries import SalesTimeSeries
+from sales_trace import span
+
+# Spill files per run; a partition's runs are merged in one go at the end
+PARTITIONS = 16
+
+# Peak bytes of a merge per byte of its inputs: both inputs plus the
+# concatenated tables the group-by reduces
+MERGE_FACTOR = 2
+
+SIZE_UNITS = {'B': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+# Every keyed table: its group keys (None: all index levels) and how it merges
+KEYED_TABLES = {
+    'cells': (CELL_KEYS, CELL_MERGE),
+    'daily': (DAILY_KEYS, 'sum'),
+    'values': (None, 'sum'),
+    'bands': (None, 'sum'),
+    'registers': (None, 'max'),
+}
+
+
+def parse_size(value):
+    """'512MB' -> 536_870_912, '2G' -> 2_147_483_648, '1000' -> 1000 bytes."""
+    text = str(value).strip().upper().replace('_', '').removesuffix('IB').removesuffix('B')
+    factor = SIZE_UNITS.get(text[-1:], None) if text else None
+    number = text[:-1] if factor else text
+    try:
+        size = int(float(number) * (factor or 1))
+    except ValueError:
+        raise ValueError(f"can't read '{value}' as a size (e.g. 512MB, 2GB)") from None
+    if size <= 0:
+        raise ValueError(f"memory budget must be positive, not '{value}'")
+    return size
+
+
+def _tables(agg):
+    sketches = agg.sketches
+    return {'cells': agg.cells, 'daily': agg.daily,
+            'values': sketches.values, 'bands': sketches.bands, 'registers': sketches.registers}
+
+
+def keyed_bytes(agg):
+    """Bytes held by an aggregate's keyed tables (the part that grows with distinct keys)."""
+    return int(sum(table.memory_usage(index=True).sum() if isinstance(table, pd.DataFrame)
+                   else table.memory_usage(index=True)
+                   for table in _tables(agg).values()))
+
+
+def _partition_of(index, partitions):
+    # hash(region, product) per entry: hash each level's few labels once,
+    # then look the hashes up through the codes
+    region, product = (pd.util.hash_array(np.asarray(index.levels[i], dtype=object))[index.codes[i]]
+                       for i in (0, 1))
+    return ((region ^ (product * np.uint64(0x9E3779B97F4A7C15))) % np.uint64(partitions)).astype(np.intp)
+
+
+def _merge_table(name, pieces):
+    keys, how = KEYED_TABLES[name]
+    keys = keys or list(pieces[0].index.names)
+    return pd.concat(pieces).groupby(level=keys, observed=True).agg(how)
+
+
+# ============================================
+# PER-PARTITION ROLLUPS
+# ============================================
+# What the dashboard reads, as partial results that combine across partitions
+KEY_STATS = {'sum': 'sum', 'count': 'sum', 'first_row': 'min'}
+
+
+def _partition_rollups(agg, months, through):
+    """One partition's share of every rollup. `months`/`through` span all the data."""
+    cells = agg.cells
+    monthly = SalesTimeSeries.from_aggregate(agg).resample('monthly', by=['region', 'product'])
+    return {
+        'region': cells.groupby(level='region', observed=True).agg(KEY_STATS),
+        'product': cells.groupby(level='product', observed=True).agg(KEY_STATS),
+        'pairs': cells['sum'].groupby(level=['region', 'product'], observed=True).sum(),
+        'months': agg.month_totals,
+        'forecast': forecast_table(monthly.reindex(months, fill_value=0), through=through),
+        'scalars': (agg.total_revenue, agg.highest_sale, agg.lowest_sale),
+    }
+
+
+def _key_stats(parts):
+    stats = pd.concat(parts).groupby(level=0, observed=True).agg(KEY_STATS)
+    order = list(stats['first_row'].sort_values(kind='stable').index)
+    stats = stats[['sum', 'count']]
+    stats['mean'] = stats['sum'] / stats['count']
+    return stats, order
+
+
+def _finish_rollups(parts, earliest, latest):
+    """The rollups SalesAggregate.from_rollups takes, from every partition's share."""
+    region_stats, regions_in_order = _key_stats(parts['region'])
+    product_stats, products_in_order = _key_stats(parts['product'])
+    months = pd.concat(parts['months'])
+    forecast = pd.concat(parts['forecast']).sort_values(['region', 'product'], kind='stable')
+    return {
+        'total_revenue': sum(total for total, _, _ in parts['scalars']),
+        'highest_sale': max(high for _, high, _ in parts['scalars']),
+        'lowest_sale': min(low for _, _, low in parts['scalars']),
+        'earliest_date': earliest,
+        'latest_date': latest,
+        'region_stats': region_stats,
+        'product_stats': product_stats,
+        'regions_in_order': regions_in_order,
+        'products_in_order': products_in_order,
+        'sparse_pivot': SparsePivot.from_series(pd.concat(parts['pairs'])),
+        'month_totals': months.groupby(level=months.index.names[0]).sum(),
+        'forecast': forecast.reset_index(drop=True),
+    }
+
+
+# ============================================
+# THE OPERATOR
+# ============================================
+class SpillingAggregator:
+    """Folds sales chunks into one aggregate, spilling keyed tables past a memory budget.
+
+    Use as a context manager (the spill folder is removed on exit):
+
+        with SpillingAggregator(512 * 1024 ** 2) as spilling:
+            for chunk in chunks:
+                spilling.add(chunk)
+            agg = spilling.result()
+    """
+
+    def __init__(self, memory_budget, partitions=PARTITIONS, spill_dir=None, top_k=TOP_K,
+                 timeline_k=TIMELINE_K):
+        self.memory_budget = memory_budget
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.top_k = top_k
+        self.timeline_k = timeline_k
+        self.agg = None
+        self.folder = None
+        # (earliest, latest) date of everything spilled so far
+        self.dates = None
+        # Spill statistics: how many runs, and bytes written to disk
+        self.spills = 0
+        self.spilled_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.folder is not None:
+            shutil.rmtree(self.folder, ignore_errors=True)
+            self.folder = None
+
+    def add(self, chunk):
+        partial = build_aggregate(chunk, top_k=self.top_k, timeline_k=self.timeline_k)
+        if self.agg is None:
+            self.agg = partial
+        else:
+            # Merging holds both inputs and their concatenation: spill first if that won't fit
+            merge_bytes = MERGE_FACTOR * (keyed_bytes(self.agg) + keyed_bytes(partial))
+            if len(self.agg.cells) and merge_bytes > self.memory_budget:
+                self.spill()
+            self.agg = self.agg.merge(partial)
+        if keyed_bytes(self.agg) > self.memory_budget:
+            self.spill()
+
+    # ----------------------------------------
+    # Spilling
+    # ----------------------------------------
+    def _path(self, partition):
+        return os.path.join(self.folder, f'partition-{partition:03d}.pkl')
+
+    def spill(self):
+        """Write the in-memory keyed tables to the partition files and empty them."""
+        if self.folder is None:
+            self.folder = tempfile.mkdtemp(prefix='sales_spill_', dir=self.spill_dir)
+        tables = _tables(self.agg)
+        self._note_dates()
+        with span('spill:write', 'load', len(tables['cells'])):
+            slices = {name: self._split(table) for name, table in tables.items()}
+            for partition in range(self.partitions):
+                path = self._path(partition)
+                with open(path, 'ab') as f:
+                    pickle.dump({name: parts[partition] for name, parts in slices.items()}, f,
+                                protocol=pickle.HIGHEST_PROTOCOL)
+            self.spilled_bytes = sum(os.path.getsize(self._path(p)) for p in range(self.partitions))
+        self.spills += 1
+        self.agg = self._with_tables({name: table.iloc[:0] for name, table in tables.items()})
+
+    def _note_dates(self):
+        # The in-memory cells only cover the current run: keep the overall date range
+        if len(self.agg.cells):
+            first, last = self.agg.earliest_date, self.agg.latest_date
+            self.dates = (first, last) if self.dates is None else (min(self.dates[0], first),
+                                                                   max(self.dates[1], last))
+
+    def _split(self, table):
+        partition = _partition_of(table.index, self.partitions)
+        # One stable sort, then slices - each part keeps its key order
+        order = np.argsort(partition, kind='stable')
+        bounds = np.searchsorted(partition[order], np.arange(self.partitions + 1))
+        table = table.take(order)
+        return [table.iloc[bounds[p]:bounds[p + 1]] for p in range(self.partitions)]
+
+    def _with_tables(self, tables):
+        agg, sketches = self.agg, self.agg.sketches
+        return SalesAggregate(
+            tables['cells'], agg.total_transactions,
+            top_sales=agg.top_sales, timeline=agg.timeline,
+            top_k=agg.top_k, timeline_k=agg.timeline_k, daily=tables['daily'],
+            sketches=SaleSketches(tables['values'], tables['bands'], tables['registers'],
+                                  sketches.accuracy, sketches.precision, sketches.edges),
+        )
+
+    # ----------------------------------------
+    # Merging the partitions
+    # ----------------------------------------
+    def _runs(self, partition):
+        with open(self._path(partition), 'rb') as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+    def result(self):
+        """The aggregate of every chunk added - its dashboard and exports match the in-memory path.
+
+        Without spills that is the in-memory aggregate itself. After a spill
+        it is SalesAggregate.from_rollups: each partition is merged, rolled
+        up and dropped in turn, so the full keyed tables never come back.
+        """
+        if self.agg is None:
+            raise ValueError("no sales rows to aggregate")
+        if not self.spills:
+            return self.agg
+
+        # What is still in memory is one more run, split the same way
+        self._note_dates()
+        earliest, latest = self.dates
+        memory = {name: self._split(table) for name, table in _tables(self.agg).items()}
+        self.agg = self._with_tables({name: table.iloc[:0] for name, table in _tables(self.agg).items()})
+        months = pd.period_range(earliest, latest, freq='M', name='period')
+        parts = {name: [] for name in ['region', 'product', 'pairs', 'months', 'forecast', 'scalars']}
+        sketches = None
+        with span('spill:merge', 'load', self.partitions):
+            for partition in range(self.partitions):
+                runs = list(self._runs(partition))
+                tables = {name: _merge_table(name, [run[name] for run in runs] + [memory[name][partition]])
+                          for name in KEYED_TABLES}
+                del runs
+                for slices in memory.values():
+                    slices[partition] = None
+                os.remove(self._path(partition))
+                if not len(tables['cells']):
+                    continue
+                agg = self._with_tables(tables)
+                for name, part in _partition_rollups(agg, months, latest).items():
+                    parts[name].append(part)
+                rolled = agg.sketches.rollups()
+                sketches = rolled if sketches is None else sketches.merge(rolled)
+                del agg, tables
+
+        return SalesAggregate.from_rollups(
+            self.agg.total_transactions, _finish_rollups(parts, earliest, latest), sketches,
+            top_sales=self.agg.top_sales, timeline=self.agg.timeline,
+            top_k=self.agg.top_k, timeline_k=self.agg.timeline_k,
+        )
+
+    def report(self):
+        """One line about the spilling ('' if everything fit in the budget)."""
+        if not self.spills:
+            return ''
+        return (f"{self.spills} spill(s) over the {self.memory_budget / 1024 ** 2:,.1f} MB budget, "
+                f"{self.spilled_bytes / 1024 ** 2:,.1f} MB in {self.partitions} partition files")
+
+
+def aggregate_spilling(chunks, memory_budget, partitions=PARTITIONS, spill_dir=None, top_k=TOP_K,
+                       timeline_k=TIMELINE_K):
+    """Fold chunks into one aggregate under a memory budget. Returns (aggregate, report line)."""
+    with SpillingAggregator(memory_budget, partitions, spill_dir, top_k, timeline_k) as spilling:
+        for chunk in chunks:
+            spilling.add(chunk)
+        return spilling.result(), spilling.report()
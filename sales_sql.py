@@ -0,0 +1,297 @@
+# SQL query backends: SQLite (built in) and DuckDB (optional)
+
+"""
+challenges.py practises SQL thinking in pandas. This module runs the same
+15 challenges - and the dashboard's aggregation pass - as real SQL inside
+an embedded database:
+
+    sqlite   a local SQLite file with indexes on region, product and
+             revenue (always available)
+    duckdb   DuckDB's columnar engine (pip install duckdb)
+
+The sales file is loaded once into .sales_cache/<file name>.<backend> (a
+folder or glob: .sales_cache/<n>-files-<hash of the paths>.<backend>) and
+reloaded when the source changes. Queries then run inside the database,
+so they work out of core: only the result comes back into pandas.
+
+    python sales_sql.py --backend sqlite --challenge 14
+    python sales_sql.py --backend duckdb --all
+    python portfolio_project.py --backend sqlite
+
+Rows keep a `row` column (0-based file order), so ties and "first seen"
+orders come out the same as in pandas. Revenue must be whole numbers (as
+for the columnar cache).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from sales_cache import CACHE_DIR, _source_stat
+from sales_io import CHUNKSIZE, SALES_FILE, resolve_input_paths
+
+# Bumped whenever a stored table changes; older databases are rebuilt
+SQL_VERSION = 2
+BACKENDS = ['sqlite', 'duckdb']
+
+# Challenge number -> SQL, in challenges.py order
+CHALLENGE_SQL = {
+    1: "SELECT revenue, date FROM sales ORDER BY row",
+    2: "SELECT date, product, region, revenue FROM sales WHERE revenue > 1200 ORDER BY row",
+    3: "SELECT date, product, region, revenue FROM sales WHERE region = 'West' ORDER BY row",
+    4: "SELECT SUM(revenue) AS total_revenue FROM sales",
+    5: "SELECT product, SUM(revenue) AS revenue FROM sales GROUP BY product ORDER BY product",
+    6: "SELECT region, COUNT(*) AS sales FROM sales GROUP BY region ORDER BY region",
+    7: "SELECT region, AVG(revenue) AS avg_revenue FROM sales GROUP BY region ORDER BY region",
+    8: "SELECT date, product, region, revenue FROM sales ORDER BY revenue DESC, row",
+    9: "SELECT date, product, region, revenue FROM sales WHERE region = 'East' AND product = 'A' ORDER BY row",
+    10: "SELECT SUM(revenue) AS product_b_revenue FROM sales WHERE product = 'B'",
+    11: "SELECT date, product, region, revenue FROM sales ORDER BY revenue DESC, row LIMIT 3",
+    12: """
+        SELECT product, SUM(revenue) AS sum, AVG(revenue) AS mean, COUNT(*) AS count
+        FROM sales GROUP BY product ORDER BY product
+    """,
+    13: """
+        SELECT region, SUM(revenue) * 100.0 / (SELECT SUM(revenue) FROM sales) AS pct_of_total
+        FROM sales GROUP BY region ORDER BY region
+    """,
+    14: """
+        SELECT date, product, region, revenue FROM sales
+        WHERE revenue > 1000 AND (region = 'East' OR region = 'West') ORDER BY row
+    """,
+    15: """
+        SELECT region, product, revenue FROM (
+            SELECT region, product, SUM(revenue) AS revenue,
+                   ROW_NUMBER() OVER (PARTITION BY region ORDER BY SUM(revenue) DESC, product) AS place
+            FROM sales GROUP BY region, product
+        ) WHERE place = 1 ORDER BY region
+    """,
+}
+
+# The dashboard's one aggregation pass (see sales_engine.py), as SQL
+CELLS_SQL = """
+    SELECT region, product, {month} AS month,
+           SUM(revenue) AS sum, COUNT(*) AS count, MIN(revenue) AS min, MAX(revenue) AS max,
+           MIN(date) AS first_date, MAX(date) AS last_date, MIN(row) AS first_row
+    FROM sales GROUP BY region, product, month
+"""
+DAILY_SQL = "SELECT region, product, date, SUM(revenue) AS revenue FROM sales GROUP BY region, product, date"
+VALUE_COUNTS_SQL = "SELECT region, product, revenue, COUNT(*) AS count FROM sales GROUP BY region, product, revenue"
+TOP_SALES_SQL = "SELECT date, product, region, revenue, row FROM sales ORDER BY revenue DESC, row LIMIT {limit}"
+TIMELINE_SQL = "SELECT date, product, region, revenue, row FROM sales ORDER BY date, row{limit}"
+COUNT_SQL = "SELECT COUNT(*) FROM sales"
+
+
+def database_path_for(paths, backend):
+    """Database file for a list of sales files: named after the file, or a hash of the whole list."""
+    paths = sorted(os.path.abspath(path) for path in paths)
+    folder, name = os.path.split(paths[0])
+    if len(paths) > 1:
+        # Different file sets must never share (and overwrite) one database
+        name = f"{len(paths)}-files-{hashlib.sha256(json.dumps(paths).encode()).hexdigest()[:16]}"
+    return os.path.join(folder, CACHE_DIR, f'{name}.{backend}')
+
+
+def _signature(paths):
+    return {'version': SQL_VERSION, 'sources': [[os.path.abspath(p), _source_stat(p)] for p in paths]}
+
+
+class _Backend:
+    """Shared loading / query logic; subclasses supply the connection and dialect."""
+
+    name = None
+    # SQL expression for 'YYYY-MM' of the date column
+    month = None
+
+    def __init__(self, source=SALES_FILE, database=None, chunksize=CHUNKSIZE):
+        self.paths = resolve_input_paths(source)
+        if not self.paths:
+            raise FileNotFoundError(f"no sales files match {source}")
+        self.database = database or database_path_for(self.paths, self.name)
+        self.chunksize = chunksize
+        os.makedirs(os.path.dirname(os.path.abspath(self.database)), exist_ok=True)
+        self.connection = self._connect()
+        self.loaded = False
+        if self._stored_signature() != _signature(self.paths):
+            self._load()
+            self.loaded = True
+
+    def _stored_signature(self):
+        try:
+            (meta,) = self.connection.execute("SELECT value FROM sales_meta WHERE key = 'signature'").fetchone()
+            return json.loads(meta)
+        except Exception:
+            # No meta table yet (new file) or an unreadable old one
+            return None
+
+    def query(self, sql):
+        """Run SQL; returns a DataFrame (date columns parsed)."""
+        result = self._fetch(sql)
+        for col in ('date', 'first_date', 'last_date'):
+            if col in result.columns:
+                result[col] = pd.to_datetime(result[col])
+        return result
+
+    def challenge(self, number):
+        return self.query(CHALLENGE_SQL[number])
+
+    def close(self):
+        self.connection.close()
+
+
+class SQLiteBackend(_Backend):
+    """Sales table in a local SQLite file, indexed for the challenge filters."""
+
+    name = 'sqlite'
+    month = "substr(date, 1, 7)"
+
+    def _connect(self):
+        import sqlite3
+        return sqlite3.connect(self.database)
+
+    def _fetch(self, sql):
+        return pd.read_sql_query(sql, self.connection)
+
+    def _load(self):
+        con = self.connection
+        con.executescript("""
+            DROP TABLE IF EXISTS sales;
+            DROP TABLE IF EXISTS sales_meta;
+            CREATE TABLE sales (row INTEGER PRIMARY KEY, date TEXT, product TEXT, region TEXT, revenue INTEGER);
+            CREATE TABLE sales_meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        row = 0
+        for path in self.paths:
+            dtype = {'date': str, 'product': str, 'region': str}
+            with pd.read_csv(path, dtype=dtype, chunksize=self.chunksize) as reader:
+                for chunk in reader:
+                    if not pd.api.types.is_integer_dtype(chunk['revenue']):
+                        raise TypeError("the SQL backends store revenue as whole numbers")
+                    # ISO dates sort and compare correctly as text
+                    dates = pd.to_datetime(chunk['date']).dt.strftime('%Y-%m-%d')
+                    con.executemany(
+                        "INSERT INTO sales VALUES (?, ?, ?, ?, ?)",
+                        zip(range(row, row + len(chunk)), dates, chunk['product'], chunk['region'],
+                            chunk['revenue'].tolist()),
+                    )
+                    row += len(chunk)
+        con.executescript("""
+            CREATE INDEX sales_region ON sales (region, product);
+            CREATE INDEX sales_product ON sales (product);
+            CREATE INDEX sales_revenue ON sales (revenue);
+            CREATE INDEX sales_date ON sales (date);
+        """)
+        con.execute("INSERT INTO sales_meta VALUES ('signature', ?)", (json.dumps(_signature(self.paths)),))
+        con.commit()
+
+
+class DuckDBBackend(_Backend):
+    """Sales table in a DuckDB database file (columnar, parallel)."""
+
+    name = 'duckdb'
+    month = "strftime(date, '%Y-%m')"
+
+    def _connect(self):
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("the duckdb backend needs the duckdb package (pip install duckdb)") from None
+        return duckdb.connect(self.database)
+
+    def _fetch(self, sql):
+        return self.connection.execute(sql).fetchdf()
+
+    def _load(self):
+        con = self.connection
+        con.execute("DROP TABLE IF EXISTS sales")
+        con.execute("DROP TABLE IF EXISTS sales_meta")
+        con.execute("CREATE TABLE sales (row BIGINT, date DATE, product VARCHAR, region VARCHAR, revenue BIGINT)")
+        con.execute("CREATE TABLE sales_meta (key VARCHAR PRIMARY KEY, value VARCHAR)")
+        # row_number() OVER () has no defined order - number the rows by
+        # (position of the file in our list, row within the scan) instead
+        con.execute("""
+            INSERT INTO sales
+            SELECT row_number() OVER (ORDER BY list_position(?, filename), file_row) - 1,
+                   CAST(date AS DATE), product, region, revenue
+            FROM read_csv(?, header = true, filename = true, columns = {
+                'date': 'VARCHAR', 'product': 'VARCHAR', 'region': 'VARCHAR', 'revenue': 'BIGINT'})
+                WITH ORDINALITY AS csv(date, product, region, revenue, filename, file_row)
+        """, [self.paths, self.paths])
+        con.execute("INSERT INTO sales_meta VALUES ('signature', ?)", [json.dumps(_signature(self.paths))])
+
+
+def open_backend(name, source=SALES_FILE, **options):
+    """SQL backend by name ('sqlite' or 'duckdb') over a sales file / folder / glob."""
+    backends = {'sqlite': SQLiteBackend, 'duckdb': DuckDBBackend}
+    if name not in backends:
+        raise ValueError(f"unknown SQL backend '{name}' (choose from {', '.join(backends)})")
+    return backends[name](source, **options)
+
+
+# ============================================
+# DASHBOARD AGGREGATE FROM SQL
+# ============================================
+def aggregate_sql(backend, timeline_k=None):
+    """SalesAggregate built from GROUP BY queries run inside the database."""
+    from sales_engine import CELL_KEYS, DAILY_KEYS, TOP_K, SalesAggregate
+    from sales_sketch import SaleSketches
+
+    cells = backend.query(CELLS_SQL.format(month=backend.month))
+    cells['month'] = pd.PeriodIndex(cells['month'], freq='M')
+    cells = _categorize(cells).set_index(CELL_KEYS).sort_index()
+    cells = cells.astype({'sum': 'int64', 'count': 'int64', 'min': 'int64', 'max': 'int64', 'first_row': 'int64'})
+
+    daily = _categorize(backend.query(DAILY_SQL)).set_index(DAILY_KEYS)['revenue'].astype('int64').sort_index()
+    values = _categorize(backend.query(VALUE_COUNTS_SQL))
+    sketches = SaleSketches.from_value_counts(values['region'], values['product'], values['revenue'],
+                                              values['count'], daily)
+    top_sales = _categorize(backend.query(TOP_SALES_SQL.format(limit=TOP_K)))
+    limit = '' if timeline_k is None else f' LIMIT {int(timeline_k)}'
+    timeline = _categorize(backend.query(TIMELINE_SQL.format(limit=limit)))
+    total = backend.connection.execute(COUNT_SQL).fetchone()[0]
+
+    return SalesAggregate(cells, total, top_sales=top_sales, timeline=timeline, timeline_k=timeline_k,
+                          daily=daily, sketches=sketches)
+
+
+def _categorize(df):
+    # Same dtypes as the pandas path: categorical region/product, numpy integers
+    for col in ('region', 'product'):
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in ('revenue', 'row'):
+        if col in df.columns:
+            df[col] = df[col].astype(np.int64)
+    return df
+
+
+# ============================================
+# COMMAND LINE
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the challenges.py queries as SQL")
+    parser.add_argument('--input', default=SALES_FILE, help="sales CSV, folder of CSVs or glob pattern")
+    parser.add_argument('--backend', choices=BACKENDS, default='sqlite')
+    which = parser.add_mutually_exclusive_group(required=True)
+    which.add_argument('--challenge', type=int, choices=sorted(CHALLENGE_SQL))
+    which.add_argument('--all', action='store_true', help="run all 15 challenges")
+    which.add_argument('--sql', help="run your own query against the sales table")
+    args = parser.parse_args(argv)
+
+    backend = open_backend(args.backend, args.input)
+    if args.sql:
+        print(backend.query(args.sql).to_string())
+        return
+    for number in sorted(CHALLENGE_SQL) if args.all else [args.challenge]:
+        sql = " ".join(CHALLENGE_SQL[number].split())
+        print(f"\n🎯 CHALLENGE {number}: {sql}")
+        print("-" * 70)
+        print(backend.challenge(number).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
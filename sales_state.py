@@ -0,0 +1,206 @@
+# Persisted aggregate state for incremental (append-only) runs
+
+"""
+New sales are appended to the end of the CSV. Instead of re-reading the
+whole history every time, we save the aggregate together with a WATERMARK:
+the byte offset just past the last row we have already counted.
+
+An append run reads only the bytes after the watermark, aggregates those
+rows and merges them into the saved state - time proportional to the new
+data. Because aggregates merge exactly, the result is identical to a full
+recompute.
+
+If the file was rewritten rather than appended to (it got shorter, or its
+first bytes changed) we fall back to a full recompute automatically.
+
+A last row without a trailing newline may still be being written. It is
+counted in every run's result, like a normal run would, but never saved:
+the watermark stays before it, so the next run reads it again (complete,
+or grown) together with whatever was appended after it.
+
+Watermarks are offsets into the CSV text, so compressed inputs (.csv.gz, ...)
+cannot be appended to this way.
+"""
+
+import hashlib
+import io
+import itertools
+import os
+import pickle
+
+import pandas as pd
+
+from sales_engine import TIMELINE_K, TOP_K, aggregate_chunks
+from sales_io import CHUNKSIZE, DATE_COLUMNS, SALES_DTYPES, apply_schema, compression_of, resolve_input_paths
+
+STATE_FILE = 'sales_state.pkl'
+STATE_VERSION = 5
+
+# How much of the start of the file we fingerprint to detect rewrites
+HEAD_BYTES = 64 * 1024
+
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of bytes [start, end) of an open binary file."""
+
+    def __init__(self, f, start, end):
+        f.seek(start)
+        self.f = f
+        self.remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        count = self.f.readinto(memoryview(buffer)[:size])
+        self.remaining -= count
+        return count
+
+
+def _complete_end(path):
+    """Byte offset just past the last newline (ignores a half-written last row)."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        pos = size
+        while pos > 0:
+            step = min(pos, 64 * 1024)
+            f.seek(pos - step)
+            block = f.read(step)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                return pos - step + newline + 1
+            pos -= step
+    return 0
+
+
+def _head_sha256(path, length):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read(min(length, HEAD_BYTES))).hexdigest()
+
+
+def _aggregate_range(path, start, end, columns, chunksize, timeline_k):
+    """Aggregate the rows stored in bytes [start, end) of the CSV (None if there are none)."""
+    with open(path, 'rb') as f:
+        source = io.BufferedReader(_ByteRange(f, start, end))
+        reader_args = dict(dtype=SALES_DTYPES, parse_dates=DATE_COLUMNS, chunksize=chunksize)
+        if start == 0:
+            reader = pd.read_csv(source, **reader_args)
+        else:
+            reader = pd.read_csv(source, header=None, names=columns, **reader_args)
+        with reader:
+            chunks = (apply_schema(chunk) for chunk in reader if len(chunk))
+            first = next(chunks, None)
+            if first is None:
+                return None
+            return aggregate_chunks(itertools.chain([first], chunks), top_k=TOP_K, timeline_k=timeline_k)
+
+
+def _read_columns(path):
+    with open(path) as f:
+        return f.readline().strip().split(',')
+
+
+def _merge(aggregate, other):
+    if aggregate is None:
+        return other
+    return aggregate if other is None else aggregate.merge(other)
+
+
+def _covers(saved_k, timeline_k):
+    # A saved timeline of the earliest `saved_k` sales serves any shorter request (None = all)
+    return saved_k is None or (timeline_k is not None and timeline_k <= saved_k)
+
+
+def _with_tail(path, state, chunksize):
+    """The saved aggregate plus the rows after the watermark that end at EOF, not a newline.
+
+    Returns (aggregate, tail rows).
+    """
+    tail = None
+    if os.path.getsize(path) > state['watermark']:
+        tail = _aggregate_range(path, state['watermark'], os.path.getsize(path), state['columns'],
+                                chunksize, state['timeline_k'])
+    aggregate = _merge(state['aggregate'], tail)
+    if aggregate is None:
+        raise ValueError(f"no sales rows in {path}")
+    return aggregate, 0 if tail is None else tail.total_transactions
+
+
+def build_state(path, chunksize=CHUNKSIZE, timeline_k=TIMELINE_K):
+    """Full recompute: aggregate every complete row and set the watermark after them."""
+    end = _complete_end(path)
+    return {
+        'version': STATE_VERSION,
+        'source': os.path.abspath(path),
+        'columns': _read_columns(path),
+        'watermark': end,
+        'head_sha256': _head_sha256(path, end),
+        'timeline_k': timeline_k,
+        # None until the file has a complete row
+        'aggregate': _aggregate_range(path, 0, end, None, chunksize, timeline_k),
+        # Rows after the watermark counted by the last run (re-read every run)
+        'tail_rows': 0,
+    }
+
+
+def load_state(state_path=STATE_FILE):
+    try:
+        with open(state_path, 'rb') as f:
+            state = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+
+def save_state(state, state_path=STATE_FILE):
+    tmp = state_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, state_path)
+
+
+def append_update(path, state_path=STATE_FILE, chunksize=CHUNKSIZE, timeline_k=TIMELINE_K):
+    """Bring the saved state up to date with rows appended to `path`.
+
+    Returns (aggregate, new_rows, mode) where mode is 'append', 'unchanged'
+    or 'full' (no usable state, the file was rewritten, or the saved
+    timeline is shorter than `timeline_k`). The aggregate covers every row
+    of the file, including an unterminated last one.
+    """
+    if resolve_input_paths(path) != [path] or os.path.isdir(path):
+        raise ValueError(f"append mode needs a single CSV file, not a folder or glob ('{path}')")
+    if compression_of(path):
+        raise ValueError(f"{path} is {compression_of(path)}-compressed; append mode needs a plain CSV")
+    state = load_state(state_path)
+    end = _complete_end(path)
+
+    rewritten = (
+        state is None
+        or state['source'] != os.path.abspath(path)
+        or not _covers(state['timeline_k'], timeline_k)
+        or end < state['watermark']
+        or _head_sha256(path, state['watermark']) != state['head_sha256']
+    )
+    if rewritten:
+        state = build_state(path, chunksize, timeline_k)
+        aggregate, state['tail_rows'] = _with_tail(path, state, chunksize)
+        save_state(state, state_path)
+        return aggregate, aggregate.total_transactions, 'full'
+
+    before = state['tail_rows']
+    complete = None
+    if end > state['watermark']:
+        complete = _aggregate_range(path, state['watermark'], end, state['columns'], chunksize,
+                                    state['timeline_k'])
+        state['aggregate'] = _merge(state['aggregate'], complete)
+        state['watermark'] = end
+        state['head_sha256'] = _head_sha256(path, end)
+    aggregate, state['tail_rows'] = _with_tail(path, state, chunksize)
+    if complete is None and state['tail_rows'] == before:
+        return aggregate, 0, 'unchanged'
+
+    save_state(state, state_path)
+    # Last run's tail rows are now among the complete rows (or still in the tail)
+    new = (0 if complete is None else complete.total_transactions) + state['tail_rows'] - before
+    return aggregate, new, 'append'
@@ -0,0 +1,154 @@
+# Time-series engine: resampling, rolling windows, period-over-period growth
+
+"""
+Works on the aggregate's daily table - revenue per (region, product, day) -
+so it never rereads the sales rows and handles years of daily data:
+
+    from sales_timeseries import SalesTimeSeries
+
+    ts = SalesTimeSeries.from_aggregate(analyzer.agg)
+    ts.resample('weekly', by='region')       # one column per region
+    ts.rolling(7, 'daily')                   # 7-day rolling revenue
+    ts.cumulative('monthly', by='product')   # running totals
+    ts.mom(by='region')                      # month-over-month growth %
+    ts.yoy('quarterly', by='product')        # same quarter last year
+
+Every result is indexed by a gap-free PeriodIndex (periods without sales
+are 0), so shifting by N rows is shifting by N periods. Growth is
+vectorized: (x - x.shift(n)) / x.shift(n). It is NaN where the earlier
+period is missing or had no revenue.
+
+    python sales_timeseries.py --freq monthly --by region --growth pop
+    python sales_timeseries.py --freq quarterly --by product --growth yoy
+"""
+
+import argparse
+
+import pandas as pd
+
+from sales_io import SALES_FILE
+
+# Name -> pandas period frequency
+FREQUENCIES = {
+    'daily': 'D',
+    'weekly': 'W',
+    'monthly': 'M',
+    'quarterly': 'Q',
+    'yearly': 'Y',
+}
+
+# Periods back to "the same period last year"
+PERIODS_PER_YEAR = {'weekly': 52, 'monthly': 12, 'quarterly': 4, 'yearly': 1}
+
+GROUPINGS = ['region', 'product']
+
+
+class SalesTimeSeries:
+    """Revenue over time, optionally split by region and/or product."""
+
+    def __init__(self, daily):
+        # daily: revenue Series indexed by (region, product, date)
+        self.daily = daily
+
+    @classmethod
+    def from_aggregate(cls, agg):
+        return cls(agg.daily)
+
+    @classmethod
+    def from_frame(cls, df):
+        from sales_engine import build_aggregate
+        return cls.from_aggregate(build_aggregate(df))
+
+    def resample(self, freq='monthly', by=None):
+        """Revenue per period: a Series (by=None) or one column per group."""
+        by = _grouping(by)
+        periods = pd.DatetimeIndex(self.daily.index.get_level_values('date')).to_period(_freq(freq))
+        keys = [self.daily.index.get_level_values(level) for level in by] + [periods.rename('period')]
+        totals = self.daily.groupby(keys, observed=True).sum()
+
+        full_range = pd.period_range(periods.min(), periods.max(), freq=periods.freq, name='period')
+        if not by:
+            return totals.reindex(full_range, fill_value=0)
+        table = totals.unstack(by, fill_value=0)
+        return table.reindex(full_range, fill_value=0)
+
+    def rolling(self, window, freq='daily', by=None):
+        """Sum over the last `window` periods (fewer at the start)."""
+        return self.resample(freq, by).rolling(window, min_periods=1).sum()
+
+    def cumulative(self, freq='daily', by=None):
+        """Running total."""
+        return self.resample(freq, by).cumsum()
+
+    def growth(self, freq='monthly', periods=1, by=None):
+        """% change against `periods` periods earlier."""
+        series = self.resample(freq, by).astype('float64')
+        earlier = series.shift(periods)
+        return (series - earlier) / earlier.where(earlier != 0) * 100
+
+    def mom(self, by=None):
+        """Month-over-month growth %."""
+        return self.growth('monthly', 1, by)
+
+    def qoq(self, by=None):
+        """Quarter-over-quarter growth %."""
+        return self.growth('quarterly', 1, by)
+
+    def yoy(self, freq='monthly', by=None):
+        """Year-over-year growth %: each period against the same period a year earlier."""
+        if freq not in PERIODS_PER_YEAR:
+            raise ValueError(f"year-over-year needs one of {', '.join(PERIODS_PER_YEAR)}, not '{freq}'")
+        return self.growth(freq, PERIODS_PER_YEAR[freq], by)
+
+
+def _freq(freq):
+    if freq not in FREQUENCIES:
+        raise ValueError(f"unknown frequency '{freq}' (choose from {', '.join(FREQUENCIES)})")
+    return FREQUENCIES[freq]
+
+
+def _grouping(by):
+    if by is None:
+        return []
+    by = [by] if isinstance(by, str) else list(by)
+    unknown = set(by) - set(GROUPINGS)
+    if unknown:
+        raise ValueError(f"can only split by {' / '.join(GROUPINGS)}, not {', '.join(sorted(unknown))}")
+    return by
+
+
+# ============================================
+# COMMAND LINE
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Revenue over time: resampled, rolling, cumulative or growth")
+    parser.add_argument('--input', default=SALES_FILE, help="sales CSV, folder of CSVs or glob pattern")
+    parser.add_argument('--freq', choices=list(FREQUENCIES), default='monthly')
+    parser.add_argument('--by', action='append', choices=GROUPINGS, help="split by region and/or product")
+    view = parser.add_mutually_exclusive_group()
+    view.add_argument('--rolling', type=int, metavar='N', help="rolling sum over N periods")
+    view.add_argument('--cumulative', action='store_true', help="running total")
+    view.add_argument('--growth', choices=['pop', 'yoy'],
+                      help="period-over-period (pop) or year-over-year growth %%")
+    args = parser.parse_args(argv)
+
+    from sales_analyzer import SalesAnalyzer
+    ts = SalesTimeSeries.from_aggregate(SalesAnalyzer(args.input).agg)
+
+    if args.rolling:
+        result = ts.rolling(args.rolling, args.freq, args.by)
+    elif args.cumulative:
+        result = ts.cumulative(args.freq, args.by)
+    elif args.growth == 'yoy':
+        result = ts.yoy(args.freq, args.by)
+    elif args.growth == 'pop':
+        result = ts.growth(args.freq, 1, args.by)
+    else:
+        result = ts.resample(args.freq, args.by)
+
+    with pd.option_context('display.max_rows', 200, 'display.width', 200):
+        print(result.round(1))
+
+
+if __name__ == '__main__':
+    main()
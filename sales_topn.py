@@ -0,0 +1,57 @@
+# Top-N picks without sorting every row
+
+"""
+`df.sort_values('revenue', ascending=False).head(3)` sorts 100M rows to
+keep 3. Here we select instead:
+
+    1. np.partition finds the n-th best value in O(rows)
+    2. keep the rows that beat it (plus the first rows that tie with it)
+    3. sort just those n rows
+
+Ties keep the earlier row, the same as DataFrame.nlargest(keep='first').
+
+Streaming runs keep only each chunk's top rows: SalesAggregate.merge
+concatenates the two kept sets and selects again (sales_engine._keep_largest),
+so memory stays at n rows per aggregate.
+"""
+
+import numpy as np
+
+
+def top_positions(values, n, largest=True):
+    """Positions of the n largest (or smallest) values, best first.
+
+    Ties keep the earlier position; NaNs are never picked.
+    """
+    values = np.asarray(values)
+    if n <= 0 or len(values) == 0:
+        return np.empty(0, dtype=np.intp)
+
+    # Smaller key = better; widen first so negating int8/uint values can't overflow
+    key = values.astype('float64' if values.dtype.kind == 'f' else 'int64')
+    if largest:
+        key = -key
+
+    if n < len(key):
+        kth = np.partition(key, n - 1)[n - 1]
+        better = np.flatnonzero(key < kth)
+        ties = np.flatnonzero(key == kth)[:n - len(better)]
+        candidates = np.concatenate([better, ties])
+    else:
+        candidates = np.arange(len(key))
+    if key.dtype.kind == 'f':
+        candidates = candidates[~np.isnan(key[candidates])]
+
+    # lexsort: last key is primary - value, then position
+    return candidates[np.lexsort((candidates, key[candidates]))]
+
+
+def nlargest(df, n, column):
+    """The n rows with the highest `column`, highest first."""
+    return df.iloc[top_positions(df[column].to_numpy(), n)]
+
+
+def rank(series, ascending=False):
+    """Series ordered best first (highest unless ascending); ties keep their order."""
+    return series.iloc[top_positions(series.to_numpy(), len(series), largest=not ascending)]
+
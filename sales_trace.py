@@ -0,0 +1,170 @@
+# Per-section timing and memory instrumentation
+
+"""
+Wrap any step of a run in a span:
+
+    from sales_trace import span
+
+    with span('pivot', 'section') as s:
+        ...
+        s.rows = 1_000_000
+
+Each finished span records wall time, CPU time, peak allocated memory
+(tracemalloc) and rows processed. Spans nest: a section that triggers the
+data load shows the load inside it.
+
+Tracing is OFF by default. While off, span() hands back one shared dummy
+object - no clocks, no tracemalloc, no list appends - so leaving the
+spans in the code costs next to nothing. Turn it on with start_tracing()
+and write the result with Tracer.write() as JSON lines or as a Chrome
+trace (open in chrome://tracing or https://ui.perfetto.dev).
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+class _NullSpan:
+    """Stand-in span used while tracing is off."""
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        # Ignore s.rows = ... when nobody is listening
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, category, rows):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.rows = rows
+        self.peak = 0
+
+    def __enter__(self):
+        stack = self.tracer._stack
+        if self.tracer.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # Remember the parent's peak so far before we reset the counter
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.alloc_start = current
+        self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.start
+        cpu = time.process_time() - self.cpu_start
+        stack = self.tracer._stack
+        stack.pop()
+
+        peak_alloc = None
+        if self.tracer.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, peak)
+            peak_alloc = self.peak - self.alloc_start
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, self.peak)
+
+        self.tracer.events.append({
+            'name': self.name,
+            'category': self.category,
+            'start': self.start - self.tracer.origin,
+            'wall_s': wall,
+            'cpu_s': cpu,
+            'peak_alloc_bytes': peak_alloc,
+            'rows': self.rows,
+            'depth': self.depth,
+        })
+        return False
+
+
+class Tracer:
+    """Collects finished spans; memory=True also tracks peak allocations."""
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.events = []
+        self.origin = time.perf_counter()
+        self.wall_origin = time.time()
+        self._stack = []
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def span(self, name, category='section', rows=None):
+        return _Span(self, name, category, rows)
+
+    def write(self, path, format='jsonl'):
+        """Write the spans as JSON lines ('jsonl') or a Chrome trace ('chrome')."""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, 'w') as f:
+            if format == 'chrome':
+                json.dump({'traceEvents': self._chrome_events(), 'displayTimeUnit': 'ms'}, f)
+            else:
+                for event in sorted(self.events, key=lambda e: e['start']):
+                    f.write(json.dumps(event) + '\n')
+
+    def _chrome_events(self):
+        pid, tid = os.getpid(), threading.get_ident()
+        return [
+            {
+                'name': e['name'],
+                'cat': e['category'],
+                'ph': 'X',
+                'ts': (self.wall_origin + e['start']) * 1e6,
+                'dur': e['wall_s'] * 1e6,
+                'pid': pid,
+                'tid': tid,
+                'args': {
+                    'cpu_ms': e['cpu_s'] * 1e3,
+                    'peak_alloc_bytes': e['peak_alloc_bytes'],
+                    'rows': e['rows'],
+                },
+            }
+            for e in self.events
+        ]
+
+
+_tracer = None
+
+
+def start_tracing(memory=True):
+    """Turn tracing on for this process; returns the Tracer."""
+    global _tracer
+    _tracer = Tracer(memory=memory)
+    return _tracer
+
+
+def stop_tracing():
+    """Turn tracing off; returns the Tracer that was active (or None)."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None and tracer.memory:
+        tracemalloc.stop()
+    return tracer
+
+
+def span(name, category='section', rows=None):
+    """Context manager timing one step (a no-op while tracing is off)."""
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, category, rows)
@@ -0,0 +1,27 @@
+import os
+
+import pandas as pd
+
+from sales_cube import SalesCube, main
+
+
+def test_query_rebuilds_a_cube_whose_csv_changed(tmp_path, capsys):
+    source, cube_path = tmp_path / 'sales.csv', str(tmp_path / 'cube.pkl')
+    pd.DataFrame({
+        'date': ['2024-01-03', '2024-01-09'],
+        'product': ['B', 'A'],
+        'region': ['East', 'West'],
+        'revenue': [700, 1250],
+    }).to_csv(source, index=False)
+    main(['--cube', cube_path, 'build', str(source)])
+    assert SalesCube.load(cube_path).is_current()
+
+    with open(source, 'a') as f:
+        f.write('2024-02-01,B,West,300\n')
+    os.utime(source, ns=(0, 0))
+    assert not SalesCube.load(cube_path).is_current()
+
+    capsys.readouterr()
+    main(['--cube', cube_path, 'query', '--product', 'B'])
+    assert capsys.readouterr().out.splitlines()[-1] == '1000'
+    assert SalesCube.load(cube_path).is_current()
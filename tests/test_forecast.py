@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+from sales_analyzer import SalesAnalyzer
+
+
+def _daily_sales(start, end, revenue=100):
+    dates = pd.date_range(start, end, freq='D')
+    return pd.DataFrame({'date': dates, 'product': 'A', 'region': 'North', 'revenue': revenue})
+
+
+def test_partial_final_month_is_forecast_not_fitted():
+    # January and February are complete, March stops on the 10th
+    analyzer = SalesAnalyzer.from_frame(_daily_sales('2026-01-01', '2026-03-10'))
+
+    forecast = analyzer.forecast.iloc[0]
+    assert forecast['month'] == '2026-03'
+    # Fitted on the complete months only: (31 + 28 days) / 2 at $100 a day
+    assert forecast['moving_average'] == pytest.approx(2950)
+
+    month, through, _ = analyzer.forecast_total
+    assert (month, through) == ('2026-03', '2026-03-10')
+    assert "Projection for 2026-03 (in progress, through 2026-03-10)" in analyzer.advanced()
+
+
+def test_complete_final_month_forecasts_the_next_one():
+    analyzer = SalesAnalyzer.from_frame(_daily_sales('2026-01-01', '2026-03-31'))
+
+    forecast = analyzer.forecast.iloc[0]
+    assert forecast['month'] == '2026-04'
+    assert forecast['moving_average'] == pytest.approx((3100 + 2800 + 3100) / 3)
+    assert analyzer.forecast_total[1] is None
+    assert "Next month projection (2026-04)" in analyzer.advanced()
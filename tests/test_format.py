@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+
+from sales_format import timeline_lines
+
+
+def test_timeline_lines_show_missing_labels_as_nan():
+    rows = pd.DataFrame({
+        'date': pd.to_datetime(['2024-02-28', '2024-02-29']),
+        'product': pd.Categorical(['A', 'B']),
+        'region': pd.Categorical(['East', np.nan]),
+        'revenue': [1200, 900],
+    })
+
+    assert "\n".join(timeline_lines(rows)) == ("  Feb 28: Product A (East) - $1,200\n"
+                                               "  Feb 29: Product B (nan) - $900")
@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from sales_index import SalesIndex
+
+
+def test_lookups_with_categories_in_first_seen_order():
+    region = ['West', 'North', 'Region 8', 'West', None, 'Region 7', 'North']
+    df = pd.DataFrame({
+        'product': pd.Categorical(['B', 'A', 'C', 'A', 'B', 'C', 'B'], categories=['B', 'C', 'A']),
+        'region': pd.Categorical(region, categories=['West', 'North', 'Region 8', 'Region 7']),
+        'revenue': [700, 1250, 300, 980, 1500, 410, 1250],
+    })
+    index = SalesIndex.from_frame(df)
+
+    for value in ['West', 'North', 'Region 7', 'Region 8']:
+        assert list(index.eq('region', value)) == list(np.flatnonzero(df['region'] == value))
+    assert list(index.eq('product', 'A')) == [1, 3]
+    assert len(index.eq('region', 'South')) == 0
+    assert list(index.isin('region', ['West', 'Region 7'])) == [0, 3, 5]
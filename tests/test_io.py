@@ -0,0 +1,18 @@
+import pandas as pd
+
+from sales_io import apply_schema
+
+
+def test_schema_sorts_first_seen_categories():
+    # What a large read_csv hands back: each block's new labels appended in first-seen order
+    df = pd.DataFrame({
+        'date': pd.to_datetime(['2024-01-03', '2024-01-09', '2024-02-14']),
+        'product': pd.Categorical(['B', 'A', 'C'], categories=['B', 'C', 'A']),
+        'region': pd.Categorical(['West', 'North', 'Region 8'], categories=['West', 'Region 8', 'North']),
+        'revenue': [700, 1250, 300],
+    })
+    apply_schema(df)
+
+    assert list(df['product'].cat.categories) == ['A', 'B', 'C']
+    assert list(df['region'].cat.categories) == ['North', 'Region 8', 'West']
+    assert list(df['region']) == ['West', 'North', 'Region 8']
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sales_engine import build_aggregate
+from sales_sketch import RELATIVE_ACCURACY
+
+
+def _sales(region, revenue):
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=len(revenue), freq='D'),
+        'product': 'A',
+        'region': region,
+        'revenue': revenue,
+    })
+
+
+def test_tiny_group_high_quantiles_use_the_nearest_rank():
+    # Two sales: P90 and P99 are the larger one, not the minimum
+    sketches = build_aggregate(_sales('North', [100, 1000])).sketches
+    quantiles = sketches.quantiles(by='region').loc['North']
+
+    assert quantiles['p50'] == pytest.approx(100, rel=RELATIVE_ACCURACY)
+    assert quantiles['p90'] == pytest.approx(1000, rel=RELATIVE_ACCURACY)
+    assert quantiles['p99'] == pytest.approx(1000, rel=RELATIVE_ACCURACY)
+
+
+def test_quantiles_match_nearest_rank_percentiles():
+    revenue = np.random.default_rng(7).integers(1, 5000, size=1001)
+    sketches = build_aggregate(_sales(np.where(np.arange(1001) % 3, 'East', 'West'), revenue)).sketches
+    by_region = sketches.quantiles(by='region')
+
+    for region in ['East', 'West']:
+        values = revenue[(np.arange(1001) % 3 != 0) == (region == 'East')]
+        for name, q in [('p50', 0.5), ('p90', 0.9), ('p99', 0.99)]:
+            exact = np.percentile(values, q * 100, method='inverted_cdf')
+            assert by_region.loc[region, name] == pytest.approx(exact, rel=RELATIVE_ACCURACY)
+
+
+def test_rows_without_region_or_product_are_left_out():
+    df = _sales('North', [100, 900, 400]).astype({'product': 'category', 'region': 'category'})
+    df.loc[1, 'region'] = np.nan
+    df.loc[2, 'product'] = np.nan
+    sketches = build_aggregate(df).sketches
+
+    assert sketches.histogram().sum() == 1
+    assert list(sketches.histogram(by='region').index) == ['North']
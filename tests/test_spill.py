@@ -0,0 +1,24 @@
+import pandas as pd
+
+from sales_analyzer import SalesAnalyzer
+
+
+def test_spilled_dashboard_matches_in_memory(tmp_path):
+    source = tmp_path / 'sales.csv'
+    pd.DataFrame({
+        'date': ['2024-01-03', '2024-01-09', '2024-02-14', '2024-02-20', '2024-01-05', '2024-03-02',
+                 '2024-03-15', '2024-03-16'],
+        'product': ['B', 'A', 'B', 'A', 'C', 'A', 'B', 'C'],
+        'region': ['South', 'North', 'North', 'South', 'West', 'West', 'North', 'South'],
+        'revenue': [700, 1250, 300, 980, 1500, 410, 1250, 95],
+    }).to_csv(source, index=False)
+    memory = SalesAnalyzer(str(source), chunksize=2, use_cache=False)
+    spilled = SalesAnalyzer(str(source), chunksize=2, use_cache=False, memory_budget=1)
+
+    # Only the finished rollups come back, not the keyed tables
+    assert spilled.agg.cells is None and spilled.agg.daily is None
+    assert spilled.spill_note
+    assert spilled.agg.regions_in_order == memory.agg.regions_in_order
+    assert spilled.agg.products_in_order == memory.agg.products_in_order
+    assert list(spilled.sections()) == list(memory.sections())
+    assert spilled.render_exports() == memory.render_exports()
@@ -0,0 +1,64 @@
+import os
+
+import pandas as pd
+import pytest
+
+import sales_sql
+from sales_analyzer import SalesAnalyzer
+from sales_sql import database_path_for, open_backend
+
+BACKENDS = [
+    'sqlite',
+    pytest.param('duckdb', marks=pytest.mark.skipif(
+        __import__('importlib').util.find_spec('duckdb') is None, reason="duckdb is not installed")),
+]
+
+
+@pytest.fixture
+def shards(tmp_path):
+    # Two shards; 'West' and 'C' are first seen in the second one
+    pd.DataFrame({
+        'date': ['2024-01-03', '2024-01-09', '2024-02-14', '2024-02-20'],
+        'product': ['B', 'A', 'B', 'A'],
+        'region': ['South', 'North', 'North', 'South'],
+        'revenue': [700, 1250, 300, 980],
+    }).to_csv(tmp_path / 'day1.csv', index=False)
+    pd.DataFrame({
+        'date': ['2024-01-05', '2024-03-02', '2024-03-15'],
+        'product': ['C', 'A', 'B'],
+        'region': ['West', 'West', 'North'],
+        'revenue': [1500, 410, 1250],
+    }).to_csv(tmp_path / 'day2.csv', index=False)
+    return tmp_path
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_sql_dashboard_matches_pandas(shards, backend):
+    pandas = SalesAnalyzer(str(shards), use_cache=False)
+    sql = SalesAnalyzer(str(shards), backend=backend)
+
+    assert sql.agg.regions_in_order == pandas.agg.regions_in_order == ['South', 'North', 'West']
+    assert sql.agg.products_in_order == pandas.agg.products_in_order == ['B', 'A', 'C']
+    assert list(sql.sections()) == list(pandas.sections())
+    assert sql.render_exports() == pandas.render_exports()
+
+
+def test_database_is_keyed_on_the_whole_file_list(shards):
+    first, second = str(shards / 'day1.csv'), str(shards / 'day2.csv')
+    single = database_path_for([first], 'sqlite')
+    both = database_path_for([second, first], 'sqlite')
+
+    assert os.path.basename(single) == 'day1.csv.sqlite'
+    assert both == database_path_for([first, second], 'sqlite')
+    assert both not in (single, database_path_for([first, str(shards / 'day3.csv')], 'sqlite'))
+
+
+def test_database_from_an_older_version_is_rebuilt(shards, monkeypatch):
+    with monkeypatch.context() as patch:
+        patch.setattr(sales_sql, 'SQL_VERSION', sales_sql.SQL_VERSION - 1)
+        open_backend('sqlite', str(shards)).close()
+
+    stale, current = open_backend('sqlite', str(shards)), open_backend('sqlite', str(shards))
+    assert stale.loaded and not current.loaded
+    stale.close()
+    current.close()